@@ -0,0 +1,209 @@
+import argparse
+import csv
+import json
+import sys
+from property import Property
+from filtering import PropertyFilter, SORT_KEYS
+from property_indexes import utilities_first_key
+from scrape_target import ScrapeTarget
+
+OUTPUT_FORMATS = ('jsonl', 'csv')
+
+
+def _yes_no(value):
+    """argparse type for yes/no flags"""
+    if value.lower() in ('y', 'yes', 'true', '1'):
+        return True
+    if value.lower() in ('n', 'no', 'false', '0'):
+        return False
+    raise argparse.ArgumentTypeError(f"expected yes or no, got {value!r}")
+
+
+def parse_sort_keys(values):
+    """Key specs for PropertyFilter.sort_by from 'name', 'name:desc' or 'priority' strings"""
+    keys = []
+    for value in values:
+        name, _, direction = value.partition(':')
+        if (name != 'priority' and name not in SORT_KEYS) or direction not in ('', 'asc', 'desc'):
+            raise ValueError(f"unknown sort key {value!r}")
+        keys.append(utilities_first_key if name == 'priority' else (name, direction == 'desc'))
+    return keys
+
+
+def _sort_key(value):
+    """argparse type for one sort key"""
+    try:
+        parse_sort_keys([value])
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+def _scrape_target(value):
+    """argparse type for one 'region/area/deal' scrape target"""
+    try:
+        ScrapeTarget.parse(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+def build_arg_parser():
+    """Command line options of main.py"""
+    parser = argparse.ArgumentParser(description="Apartment Rental Finder - Riga (SS.com)")
+    parser.add_argument('--offline', action='store_true', help="Use stored listings, do not scrape")
+    parser.add_argument('--batch', action='store_true',
+                        help="Run one query non-interactively and write the results")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep polling ss.com and report new listings until interrupted")
+    parser.add_argument('--serve', action='store_true',
+                        help="Serve JSON queries over HTTP (with --watch, keep the data current)")
+    parser.add_argument('--regions', type=_scrape_target, nargs='+', default=['riga/all/hand_over'],
+                        metavar='REGION/AREA/DEAL',
+                        help="ss.com sections to scrape in parallel, e.g. riga/centre/hand_over jurmala/all/sell")
+    parser.add_argument('--stop-after-known', type=int, default=5, metavar='N',
+                        help="Stop reading a section's listing pages after N consecutive stored ads")
+    parser.add_argument('--max-pages', type=int, metavar='N', help="Read at most N listing pages per section")
+    parser.add_argument('--host', default='127.0.0.1', help="Address for --serve")
+    parser.add_argument('--port', type=int, default=8765, help="Port for --serve")
+
+    query = parser.add_argument_group("batch query")
+    query.add_argument('--min-price', type=float)
+    query.add_argument('--max-price', type=float)
+    query.add_argument('--utilities', type=_yes_no, metavar='yes|no')
+    query.add_argument('--district', nargs='+', help="Match any of these districts in the address")
+    query.add_argument('--street', help="Address contains all words of this street (e.g. 'Brīvības iela')")
+    query.add_argument('--keywords', help="Title, address or description contain all these words")
+    query.add_argument('--max-distance', type=float, help="Maximum distance from center in km")
+    query.add_argument('--near', type=float, nargs=2, metavar=('LAT', 'LNG'),
+                       help="Geocoded listings nearest to a point first (e.g. a workplace)")
+    query.add_argument('--radius', type=float, metavar='KM', help="With --near: only listings within this many km")
+    query.add_argument('--min-rooms', type=int)
+    query.add_argument('--max-rooms', type=int)
+    query.add_argument('--furniture', type=_yes_no, metavar='yes|no')
+    query.add_argument('--pets', type=_yes_no, metavar='yes|no')
+    query.add_argument('--parking', type=_yes_no, metavar='yes|no')
+    query.add_argument('--published', metavar='DATE', help="Published date (ISO format)")
+    query.add_argument('--new-only', action='store_true', help="Only listings not seen before")
+    query.add_argument('--sort', type=_sort_key, nargs='+',
+                       help=f"Sort keys: {', '.join(SORT_KEYS)} or priority; add :desc for descending "
+                            f"(default: price, or nearest first with --near)")
+    query.add_argument('--limit', type=int, help="Return at most this many results")
+
+    output = parser.add_argument_group("batch output")
+    output.add_argument('--format', choices=OUTPUT_FORMATS, default='jsonl')
+    output.add_argument('--output', default='-', help="Output file (default: stdout)")
+    return parser
+
+
+def _has_filters(args):
+    """Whether the query has any predicate besides the price range"""
+    return any(value is not None for value in (
+        args.utilities, args.district, args.street, args.keywords, args.max_distance,
+        args.min_rooms, args.max_rooms, args.furniture, args.pets, args.parking, args.published
+    ))
+
+
+def _keep_ids(candidates, matches):
+    """candidates (in their order) whose id is among matches"""
+    ids = {prop.id for prop in matches}
+    return [prop for prop in candidates if prop.id in ids]
+
+
+def run_query(indexes, args, new_ids=None):
+    """Evaluate the query described by args over a PropertyIndexes
+
+    Only the structures the query needs are built: the BST for price
+    ranges, the min-heap or priority queue for a limited, otherwise
+    unfiltered cheapest-first or priority listing, the spatial grid for
+    --near and the text index for district, street and keyword filters.
+    """
+    sort = args.sort or ([] if args.near else ['price'])
+    keys = parse_sort_keys(sort)
+    price_bounded = args.min_price is not None or args.max_price is not None
+    unfiltered = not price_bounded and not _has_filters(args) and new_ids is None
+
+    if unfiltered and args.limit is not None:
+        if args.near:
+            if args.radius is None and not sort:
+                return indexes.nearest(*args.near, args.limit)
+        elif sort == ['price']:
+            return indexes.min_heap.peek_k(args.limit)
+        elif sort == ['priority']:
+            return indexes.priority_queue.peek_k(args.limit)
+
+    if args.near:
+        if args.radius is not None:
+            candidates = indexes.near(*args.near, args.radius)
+        else:
+            candidates = indexes.nearest(*args.near, len(indexes.properties))
+    elif price_bounded:
+        candidates = indexes.bst.find_range(
+            args.min_price if args.min_price is not None else float('-inf'),
+            args.max_price if args.max_price is not None else float('inf')
+        )
+    else:
+        candidates = indexes.properties
+    if new_ids is not None:
+        candidates = [prop for prop in candidates if prop.id in new_ids]
+    # Text predicates are posting-list lookups in the text index
+    text_index = indexes.text_index if args.district or args.street or args.keywords else None
+    if args.district:
+        candidates = _keep_ids(candidates, text_index.filter_by_district(args.district))
+    if args.street:
+        candidates = _keep_ids(candidates, text_index.filter_by_street(args.street))
+    if args.keywords:
+        candidates = _keep_ids(candidates, text_index.filter_by_keywords(args.keywords))
+
+    query = PropertyFilter.query(candidates)
+    if args.near and price_bounded:
+        query.price_range(args.min_price if args.min_price is not None else float('-inf'),
+                          args.max_price if args.max_price is not None else float('inf'))
+    if args.utilities is not None:
+        query.utilities_included(args.utilities)
+    if args.max_distance is not None:
+        query.max_distance(args.max_distance)
+    if args.min_rooms is not None or args.max_rooms is not None:
+        query.rooms(args.min_rooms or 0, args.max_rooms if args.max_rooms is not None else float('inf'))
+    if args.furniture is not None:
+        query.furniture(args.furniture)
+    if args.pets is not None:
+        query.pets_allowed(args.pets)
+    if args.parking is not None:
+        query.parking(args.parking)
+    if args.published:
+        query.publish_date(args.published)
+    matches = query.results()
+
+    if not keys:  # Nearest first, as returned by the spatial grid
+        return matches[:args.limit] if args.limit is not None else matches
+    if args.limit is not None:
+        return PropertyFilter.top_k(matches, args.limit, *keys)
+    return PropertyFilter.sort_by(matches, *keys)
+
+
+def write_jsonl(properties, stream):
+    """One JSON object per line"""
+    for prop in properties:
+        stream.write(json.dumps(prop.to_dict(), ensure_ascii=False) + "\n")
+
+
+def write_csv(properties, stream):
+    """CSV with a header row; list fields are joined with '; '"""
+    writer = csv.DictWriter(stream, fieldnames=Property.__slots__)
+    writer.writeheader()
+    for prop in properties:
+        row = prop.to_dict()
+        row['kitchen_equipment'] = "; ".join(row['kitchen_equipment'] or [])
+        writer.writerow(row)
+
+
+def write_results(properties, output_format, path='-'):
+    """Write properties as jsonl or csv to path ('-' for stdout)"""
+    writer = write_csv if output_format == 'csv' else write_jsonl
+    if path == '-':
+        writer(properties, sys.stdout)
+        sys.stdout.flush()
+        return
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer(properties, f)
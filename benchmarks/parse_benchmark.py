@@ -0,0 +1,83 @@
+"""Benchmark HTML parser backends on recorded SS.com pages.
+
+Record a listing page and a few ad pages once:
+
+    python benchmarks/parse_benchmark.py --record pages/
+
+then compare the parser backends on them (no network needed):
+
+    python benchmarks/parse_benchmark.py pages/
+"""
+import argparse
+import glob
+import importlib.util
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scraper import PropertyScraper
+
+
+def record_pages(directory, ads=10):
+    """Save the first listing page and the first ads as list_*.html / ad_*.html"""
+    os.makedirs(directory, exist_ok=True)
+    scraper = PropertyScraper()
+    response = scraper.http.get(scraper.LIST_URL, headers=scraper.headers)
+    with open(os.path.join(directory, 'list_1.html'), 'wb') as f:
+        f.write(response.content)
+
+    listings = scraper._parse_listing_rows(scraper._parse_list_page(response.content), float('inf'))
+    for link, _, _ in listings[:ads]:
+        ad_response = scraper.http.get(link, headers=scraper.headers)
+        with open(os.path.join(directory, f'ad_{scraper._ad_id(link)}.html'), 'wb') as f:
+            f.write(ad_response.content)
+        time.sleep(0.5)
+    print(f"Recorded 1 listing page and {min(ads, len(listings))} ad pages in {directory}")
+
+
+def time_per_page(func, pages, repeat):
+    """Return the mean time in milliseconds of func over all pages"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            func(page)
+    return (time.perf_counter() - start) / (repeat * len(pages)) * 1000
+
+
+def run_benchmark(directory, repeat=5):
+    """Time list and detail page parsing for every installed backend"""
+    list_pages = [open(path, 'rb').read() for path in sorted(glob.glob(os.path.join(directory, 'list_*.html')))]
+    ad_pages = [open(path, 'rb').read() for path in sorted(glob.glob(os.path.join(directory, 'ad_*.html')))]
+    if not list_pages or not ad_pages:
+        print(f"No recorded pages in {directory}, run with --record first")
+        return
+
+    parsers = ['html.parser'] + [name for name in ('lxml', 'html5lib') if importlib.util.find_spec(name)]
+    reference = PropertyScraper(parser='html.parser')
+    expected = [reference._parse_ss_property_details(page) for page in ad_pages]
+
+    print(f"{len(list_pages)} listing pages, {len(ad_pages)} ad pages, {repeat} repeats")
+    print(f"{'parser':<12} {'list page ms':>14} {'ad page ms':>12}  same details")
+    for parser in parsers:
+        scraper = PropertyScraper(parser=parser)
+        list_ms = time_per_page(
+            lambda page: scraper._parse_listing_rows(scraper._parse_list_page(page), float('inf')),
+            list_pages, repeat
+        )
+        ad_ms = time_per_page(scraper._parse_ss_property_details, ad_pages, repeat)
+        same = [scraper._parse_ss_property_details(page) for page in ad_pages] == expected
+        print(f"{parser:<12} {list_ms:>14.3f} {ad_ms:>12.3f}  {'yes' if same else 'NO'}")
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('directory', help="Directory with recorded pages")
+    arg_parser.add_argument('--record', action='store_true', help="Download pages into directory first")
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    if args.record:
+        record_pages(args.directory)
+    run_benchmark(args.directory, args.repeat)
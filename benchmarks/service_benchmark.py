@@ -0,0 +1,124 @@
+"""Benchmark query service latency under concurrent clients.
+
+Starts a QueryService over synthetic listings in a background thread and
+runs concurrent keep-alive clients against it, each sending a mix of
+price, distance, utilities, district and top-k queries:
+
+    python benchmarks/service_benchmark.py --properties 10000 --clients 8 --requests 500
+
+Reports p50/p90/p99/max latency separately for the first (uncached) pass
+over the query mix and for the remaining, mostly cached, requests.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from property_indexes import PropertyIndexes
+from query_service import QueryService
+from structures_benchmark import generate_properties, DISTRICTS
+
+
+def query_mix(count, seed=0):
+    """count request targets drawn from a fixed pool of distinct queries"""
+    rng = random.Random(seed)
+    pool = (
+        [f"/price?min={low}&max={low + 100}&limit=20" for low in range(200, 1400, 50)]
+        + [f"/distance?max={km}&limit=20" for km in (1, 2, 3, 5, 8)]
+        + ["/utilities?included=yes&limit=20", "/utilities?included=no&limit=20"]
+        + [f"/district?name={name}&limit=20" for name, *_ in DISTRICTS]
+        + [f"/top?k={k}&sort={sort}" for k in (5, 10, 50) for sort in ('price', 'priority', 'price_per_m2')]
+    )
+    return pool + [rng.choice(pool) for _ in range(count - len(pool))]
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values"""
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def start_server(service):
+    """Run the service on an ephemeral port in a daemon thread; returns the port"""
+    started = threading.Event()
+    port = []
+
+    def run():
+        async def main():
+            server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+            port.append(server.sockets[0].getsockname()[1])
+            started.set()
+            await server.serve_forever()
+        asyncio.run(main())
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    return port[0]
+
+
+async def client(port, targets, latencies):
+    """Send targets one after another on one keep-alive connection"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for target in targets:
+        start = time.perf_counter()
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        await writer.drain()
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line == b'\r\n':
+                break
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+        await reader.readexactly(length)
+        latencies.append((target, time.perf_counter() - start))
+    writer.close()
+
+
+async def run_clients(port, targets, clients):
+    """Split targets over concurrent clients; returns (target, seconds) per request"""
+    latencies = []
+    await asyncio.gather(*(client(port, targets[i::clients], latencies) for i in range(clients)))
+    return latencies
+
+
+def report(label, seconds):
+    """Print latency percentiles in milliseconds"""
+    values = sorted(seconds)
+    print(f"{label:<22} {len(values):>7} {statistics.median(values) * 1000:>8.2f} "
+          f"{percentile(values, 0.9) * 1000:>8.2f} {percentile(values, 0.99) * 1000:>8.2f} "
+          f"{values[-1] * 1000:>8.2f}")
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--properties', type=int, default=10000)
+    arg_parser.add_argument('--clients', type=int, default=8)
+    arg_parser.add_argument('--requests', type=int, default=500, help="Requests per client")
+    args = arg_parser.parse_args()
+
+    service = QueryService(PropertyIndexes(generate_properties(args.properties)).build_all())
+    port = start_server(service)
+    targets = query_mix(args.clients * args.requests)
+
+    start = time.perf_counter()
+    latencies = asyncio.run(run_clients(port, targets, args.clients))
+    elapsed = time.perf_counter() - start
+
+    seen = set()
+    cold, warm = [], []
+    for target, seconds in latencies:
+        (warm if target in seen else cold).append(seconds)
+        seen.add(target)
+    print(f"{args.properties} listings, {args.clients} clients, {len(latencies)} requests "
+          f"in {elapsed:.2f} s ({len(latencies) / elapsed:.0f} requests/s)")
+    print(f"{'':<22} {'count':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    report("first (uncached)", cold)
+    report("repeated (cached)", warm)
+    report("all", cold + warm)
+    print(f"Cache: {service.hits} hits, {service.misses} misses")
@@ -0,0 +1,100 @@
+"""Benchmark cold start of query-only runs.
+
+Writes a synthetic listings snapshot into a temporary directory, then
+measures, in fresh interpreters:
+
+  * bare interpreter start-up (python -c pass), the floor for any run
+  * python -X importtime -c "import main", listing the slowest imports and
+    any network/parsing module that should have been deferred
+  * python main.py --batch --offline --limit 1, start to first result
+
+    python benchmarks/startup_benchmark.py --properties 2000 --runs 10
+
+Exits with status 1 when the median time to first result, minus bare
+interpreter start-up, exceeds --budget-ms.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, REPO)
+
+from snapshot import save_snapshot
+from structures_benchmark import generate_properties
+
+# Modules a query-only run should never import
+DEFERRED_MODULES = ('requests', 'bs4', 'lxml', 'numpy', 'scraper', 'utils', 'http_client')
+
+
+def wall_times(command, runs, cwd):
+    """Wall-clock seconds of running command runs times"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def import_times(cwd, code='import main'):
+    """(module, self us, cumulative us) for every import made running code, from -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=cwd, check=True, capture_output=True, text=True,
+        env=dict(os.environ, PYTHONPATH=REPO)
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def run_benchmark(properties, runs, top, budget_ms):
+    """Print the measurements; returns True when within budget"""
+    with tempfile.TemporaryDirectory() as directory:
+        save_snapshot(generate_properties(properties), os.path.join(directory, 'listings.snapshot'))
+
+        baseline = statistics.median(wall_times([sys.executable, '-c', 'pass'], runs, directory))
+        print(f"Interpreter start-up: {baseline * 1000:.1f} ms (median of {runs})")
+
+        # Modules the bare interpreter imports anyway (site, .pth hooks) are left out
+        startup_modules = {name for name, _, _ in import_times(directory, 'pass')}
+        modules = [module for module in import_times(directory) if module[0] not in startup_modules]
+        main_us = next(cumulative for name, _, cumulative in modules if name == 'main')
+        print(f"\nimport main: {main_us / 1000:.1f} ms cumulative, {len(modules)} modules")
+        print(f"{'module':<40} {'self ms':>8} {'cumulative ms':>14}")
+        for name, self_us, cumulative_us in sorted(modules, key=lambda m: m[2], reverse=True)[:top]:
+            print(f"{name:<40} {self_us / 1000:>8.1f} {cumulative_us / 1000:>14.1f}")
+        imported = {name for name, _, _ in modules}
+        eager = [name for name in DEFERRED_MODULES if name in imported]
+        if eager:
+            print(f"Imported eagerly (should be deferred): {', '.join(eager)}")
+
+        query = [sys.executable, os.path.join(REPO, 'main.py'), '--batch', '--offline', '--limit', '1']
+        times = wall_times(query, runs, directory)
+        median = statistics.median(times)
+        print(f"\nFirst query result ({properties} listings from snapshot): "
+              f"median {median * 1000:.1f} ms, min {min(times) * 1000:.1f} ms")
+        over_baseline_ms = (median - baseline) * 1000
+        print(f"Above interpreter start-up: {over_baseline_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+        return over_baseline_ms <= budget_ms
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--properties', type=int, default=2000, help="Listings in the snapshot")
+    arg_parser.add_argument('--runs', type=int, default=10)
+    arg_parser.add_argument('--top', type=int, default=15, help="Slowest imports to list")
+    arg_parser.add_argument('--budget-ms', type=float, default=100)
+    args = arg_parser.parse_args()
+
+    if not run_benchmark(args.properties, args.runs, args.top, args.budget_ms):
+        sys.exit(1)
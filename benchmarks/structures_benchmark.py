@@ -0,0 +1,297 @@
+"""Benchmark data structures and filters on synthetic listings.
+
+Generates Property datasets with realistic Riga price/size/district
+distributions in several orderings and times PropertyFilter, the BSTs,
+the heaps and PriorityQueue on them:
+
+    python benchmarks/structures_benchmark.py --sizes 1000 10000 100000
+
+Save the results and compare a later run against them:
+
+    python benchmarks/structures_benchmark.py --save-baseline baseline.json
+    python benchmarks/structures_benchmark.py --compare baseline.json
+
+With --compare the exit status is 1 when a case got slower than
+--threshold times its baseline time.
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from property import Property
+from filtering import PropertyFilter, PropertyQuery
+from data_structures.property_store import PropertyStore
+from data_structures.binary_search_tree import BinarySearchTree, BalancedBinarySearchTree
+from data_structures.heap import MinHeap, MaxHeap
+from data_structures.priority_queue import PriorityQueue
+
+# District, relative share of listings, price factor, distance to center in km
+DISTRICTS = [
+    ('Centrs', 20, 1.4, 1.0), ('Vecrīga', 5, 1.6, 0.5), ('Teika', 8, 1.0, 4.5),
+    ('Purvciems', 10, 0.8, 6.5), ('Imanta', 8, 0.75, 8.0), ('Āgenskalns', 7, 0.95, 3.0),
+    ('Ķengarags', 9, 0.7, 7.0), ('Pļavnieki', 8, 0.72, 8.5), ('Mežciems', 5, 0.8, 8.0),
+    ('Ziepniekkalns', 6, 0.75, 7.5), ('Sarkandaugava', 4, 0.7, 5.5), ('Jugla', 5, 0.78, 9.0),
+    ('Mežaparks', 2, 1.3, 6.0), ('Čiekurkalns', 3, 0.8, 4.5),
+]
+STREETS = ['Brīvības iela', 'Krišjāņa Barona iela', 'Valdemāra iela', 'Lāčplēša iela',
+           'Maskavas iela', 'Ganību dambis', 'Dzirnavu iela', 'Tērbatas iela', 'Kalnciema iela']
+KITCHEN_EQUIPMENT = ['Ledusskapis', 'Plīts', 'Cepeškrāsns', 'Mikroviļņu krāsns', 'Trauku mazgājamā mašīna']
+
+ORDERINGS = ('random', 'sorted', 'reversed', 'equal_prices')
+
+# Above this size cases are skipped on the orderings where they are quadratic:
+# the plain BST degenerates into a list on sorted input
+QUADRATIC_LIMIT = 20000
+
+
+def generate_properties(n, ordering='random', seed=0):
+    """n synthetic properties in one of ORDERINGS (by price)"""
+    rng = random.Random(seed)
+    weights = [district[1] for district in DISTRICTS]
+    properties = []
+    for i in range(n):
+        district, _, price_factor, distance = rng.choices(DISTRICTS, weights)[0]
+        rooms = min(5, 1 + int(rng.expovariate(0.9)))
+        size = round(max(12.0, rng.gauss(18 + rooms * 17, 8)), 1)
+        price = round(min(1500.0, max(120.0, size * 9.5 * price_factor * rng.lognormvariate(0, 0.25))))
+        distance_km = round(max(0.1, rng.gauss(distance, distance * 0.3)), 2)
+        properties.append(Property(
+            id=f"syn{i}",
+            title=f"{rooms}-room flat, {district}",
+            price=float(price),
+            address=f"{district}, {rng.choice(STREETS)} {rng.randint(1, 150)}",
+            size=size,
+            rooms=rooms,
+            floor=rng.randint(1, 9),
+            has_furniture=rng.random() < 0.7,
+            kitchen_equipment=rng.sample(KITCHEN_EQUIPMENT, rng.randint(0, len(KITCHEN_EQUIPMENT))),
+            bathroom=rng.choice(['Separate', 'Combined']),
+            utilities_included=rng.random() < 0.3,
+            source_url=f"https://www.ss.com/msg/lv/real-estate/flats/riga/syn/{i}.html",
+            portal="ss.com",
+            published_date=f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            has_parking=rng.random() < 0.2,
+            pets_allowed=rng.random() < 0.25,
+        ))
+        properties[-1].distance_to_center = distance_km
+        properties[-1].time_to_center = int(distance_km * 3 + 5)
+
+    if ordering == 'sorted':
+        properties.sort(key=lambda prop: prop.price)
+    elif ordering == 'reversed':
+        properties.sort(key=lambda prop: prop.price, reverse=True)
+    elif ordering == 'equal_prices':
+        # Few distinct prices: many equal keys in every structure
+        for prop in properties:
+            prop.price = float(300 + 100 * (rng.randrange(5)))
+    return properties
+
+
+def _utilities_first(prop):
+    return (not prop.utilities_included, prop.price)
+
+
+def _utilities_first_comparator(x, y):
+    if x.utilities_included != y.utilities_included:
+        return x.utilities_included
+    return x.price < y.price
+
+
+def _insert_all(tree_class):
+    def run(properties):
+        tree = tree_class()
+        for prop in properties:
+            tree.insert(prop.price, prop)
+        return tree
+    return run
+
+
+def _range_queries(properties):
+    """BST built from sorted data, then 1000 range queries"""
+    tree = BalancedBinarySearchTree.from_sorted(
+        (prop.price, prop) for prop in sorted(properties, key=lambda prop: prop.price)
+    )
+    return lambda _: [tree.find_range(low, low + 50) for low in range(200, 1200)]
+
+
+def _drain(heap, extract):
+    while heap.size:
+        extract(heap)
+
+
+def _heap_insert_extract(heap_class, extract):
+    def run(properties):
+        heap = heap_class()
+        for prop in properties:
+            heap.insert(prop)
+        _drain(heap, extract)
+    return run
+
+
+def _store_query(properties):
+    """PropertyStore built up front, then one compound query"""
+    store = PropertyStore(properties)
+    return lambda _: PropertyQuery(store).price_range(300, 800).utilities_included(True).max_distance(5).indices()
+
+
+def _heap_peek(properties):
+    """Heap built up front, then a non-destructive top-100"""
+    heap = MinHeap.from_iterable(properties)
+    return lambda _: heap.peek_k(100)
+
+
+def _queue_updates(properties):
+    """Queue built up front, then a price change for every 10th listing"""
+    queue = PriorityQueue.from_iterable(properties, key=_utilities_first)
+    # Updated copies, so the shared dataset keeps its prices for later cases
+    changed = [Property.from_dict(prop.to_dict()) for prop in properties[::10]]
+
+    def run(_):
+        for prop in changed:
+            prop.price += 1
+            queue.update_priority(prop)
+    return run
+
+
+# name -> (setup, quadratic orderings, func). setup(properties) does untimed preparation
+# and returns the timed function, otherwise func(properties) is timed directly.
+CASES = {
+    'sort_by_price': (None, (), PropertyFilter.sort_by_price_ascending),
+    'sort_multi_key': (None, (), lambda props: PropertyFilter.sort_by(props, 'price', ('size', True))),
+    'top_k_10': (None, (), lambda props: PropertyFilter.top_k(props, 10, 'price_per_m2')),
+    'filter_list': (None, (), lambda props: PropertyQuery(props).price_range(300, 800)
+                    .utilities_included(True).max_distance(5).results()),
+    'filter_store': (_store_query, (), None),
+    'remove_duplicates': (None, (), PropertyFilter.remove_duplicates),
+    'bst_insert': (None, ('sorted', 'reversed'), _insert_all(BinarySearchTree)),
+    'avl_insert': (None, (), _insert_all(BalancedBinarySearchTree)),
+    'bst_from_sorted': (None, (), lambda props: BalancedBinarySearchTree.from_sorted(
+        (prop.price, prop) for prop in sorted(props, key=lambda prop: prop.price))),
+    'bst_find_range': (_range_queries, (), None),
+    'min_heap_build': (None, (), MinHeap.from_iterable),
+    'min_heap_insert_extract': (None, (), _heap_insert_extract(MinHeap, MinHeap.extract_min)),
+    'max_heap_insert_extract': (None, (), _heap_insert_extract(MaxHeap, MaxHeap.extract_max)),
+    'heap_peek_100': (_heap_peek, (), None),
+    'pq_key_build_drain': (None, (), lambda props: _drain(
+        PriorityQueue.from_iterable(props, key=_utilities_first), PriorityQueue.extract_top)),
+    'pq_comparator_build_drain': (None, (), lambda props: _drain(
+        PriorityQueue.from_iterable(props, comparator=_utilities_first_comparator), PriorityQueue.extract_top)),
+    'pq_update_priority': (_queue_updates, (), None),
+}
+
+
+def measure(func, properties, repeat, memory):
+    """Best time in seconds over repeat runs and peak traced memory in MB"""
+    best = math.inf
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(properties)
+        best = min(best, time.perf_counter() - start)
+
+    peak_mb = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        func(properties)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return best, peak_mb
+
+
+def run_benchmark(sizes, orderings, case_names, repeat=3, memory=True):
+    """Run every case on every size/ordering; returns a list of result dicts"""
+    results = []
+    print(f"{'case':<26} {'ordering':<13} {'n':>8} {'seconds':>10} {'items/s':>12} {'peak MB':>9}")
+    for n in sizes:
+        for ordering in orderings:
+            properties = generate_properties(n, ordering)
+            for name in case_names:
+                setup, quadratic, func = CASES[name]
+                if ordering in quadratic and n > QUADRATIC_LIMIT:
+                    print(f"{name:<26} {ordering:<13} {n:>8} {'skipped (quadratic)':>33}")
+                    continue
+                timed = setup(properties) if setup else func
+                seconds, peak_mb = measure(timed, properties, repeat, memory)
+                results.append({'case': name, 'ordering': ordering, 'n': n,
+                                'seconds': seconds, 'peak_mb': peak_mb})
+                memory_text = f"{peak_mb:>9.1f}" if peak_mb is not None else f"{'-':>9}"
+                print(f"{name:<26} {ordering:<13} {n:>8} {seconds:>10.4f} {n / seconds:>12.0f} {memory_text}")
+    return results
+
+
+def print_scaling(results):
+    """Empirical exponent k of time ~ n^k between successive sizes"""
+    print("\nScaling (time ~ n^k between successive sizes):")
+    series = {}
+    for result in results:
+        series.setdefault((result['case'], result['ordering']), []).append(result)
+    for (name, ordering), points in series.items():
+        points.sort(key=lambda result: result['n'])
+        exponents = [
+            math.log(b['seconds'] / a['seconds']) / math.log(b['n'] / a['n'])
+            for a, b in zip(points, points[1:]) if a['seconds'] > 0 and b['seconds'] > 0
+        ]
+        if exponents:
+            print(f"{name:<26} {ordering:<13} " + "  ".join(f"{k:5.2f}" for k in exponents))
+
+
+def compare_to_baseline(results, path, threshold):
+    """Print time ratios against a saved baseline; returns the regressed cases"""
+    with open(path) as f:
+        baseline = {(r['case'], r['ordering'], r['n']): r for r in json.load(f)['results']}
+
+    regressions = []
+    print(f"\nComparison with {path} (ratio = now / baseline):")
+    for result in results:
+        old = baseline.get((result['case'], result['ordering'], result['n']))
+        if old is None or not old['seconds']:
+            continue
+        ratio = result['seconds'] / old['seconds']
+        flag = ''
+        if ratio > threshold:
+            flag = '  REGRESSION'
+            regressions.append(result)
+        elif ratio < 1 / threshold:
+            flag = '  faster'
+        print(f"{result['case']:<26} {result['ordering']:<13} {result['n']:>8} {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def save_baseline(results, path):
+    """Write results together with the interpreter/platform they were measured on"""
+    with open(path, 'w') as f:
+        json.dump({'python': platform.python_version(), 'platform': platform.platform(),
+                   'results': results}, f, indent=1)
+    print(f"\nBaseline saved to {path}")
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                            help="Dataset sizes (up to 1000000)")
+    arg_parser.add_argument('--orderings', nargs='+', choices=ORDERINGS, default=list(ORDERINGS))
+    arg_parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES))
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc run")
+    arg_parser.add_argument('--save-baseline', metavar='PATH')
+    arg_parser.add_argument('--compare', metavar='PATH')
+    arg_parser.add_argument('--threshold', type=float, default=1.25,
+                            help="Slowdown ratio reported as a regression")
+    args = arg_parser.parse_args()
+
+    results = run_benchmark(args.sizes, args.orderings, args.cases, args.repeat, not args.no_memory)
+    print_scaling(results)
+    if args.save_baseline:
+        save_baseline(results, args.save_baseline)
+    if args.compare and compare_to_baseline(results, args.compare, args.threshold):
+        sys.exit(1)
@@ -5,13 +5,27 @@ class BSTNode:
         """Initialize BST node"""
         self.key = key          # Key (price or other parameter)
         self.value = value if value else []  # Value list (properties with this key)
+        self.value_ids = {id(item) for item in self.value}  # Identities of the values, for O(1) checks
         self.left = None        # Left subtree (smaller values)
         self.right = None       # Right subtree (larger values)
+        self.height = 1         # Subtree height (used by the balanced tree)
     
     def add_value(self, value):
-        """Add value to node"""
-        if value not in self.value:  # Avoid duplicates
+        """Add value to node (each object once)"""
+        # Identity, not ==: Property.__eq__ is a fuzzy near-duplicate match, and an
+        # index must hold every listing it is given, or removing one of two
+        # near-duplicates would leave neither in the tree
+        if id(value) not in self.value_ids:
+            self.value_ids.add(id(value))
             self.value.append(value)
+    
+    def remove_value(self, value):
+        """Remove value (the same object) from node, return whether it was there"""
+        if id(value) not in self.value_ids:
+            return False
+        self.value_ids.discard(id(value))
+        self.value = [item for item in self.value if item is not value]
+        return True
 
 
 class BinarySearchTree:
@@ -22,6 +36,47 @@ class BinarySearchTree:
         self.root = None
         self.size = 0  # Tree size for analysis
     
+    @classmethod
+    def from_sorted(cls, items):
+        """Build a perfectly balanced tree in O(n) from (key, value) pairs sorted by key"""
+        # Group values of equal keys into one node each
+        nodes = []
+        previous_key = None
+        for key, value in items:
+            if nodes and key == previous_key:
+                nodes[-1].add_value(value)
+                continue
+            if nodes and key < previous_key:
+                raise ValueError("from_sorted requires items in ascending key order")
+            nodes.append(BSTNode(key, [value]))
+            previous_key = key
+        
+        tree = cls()
+        tree.size = len(nodes)
+        if not nodes:
+            return tree
+        
+        # Link the middle node of every range to the middles of its two halves;
+        # ranges are processed after their children so heights can be set
+        links = []
+        stack = [(0, len(nodes) - 1)]
+        while stack:
+            low, high = stack.pop()
+            middle = (low + high) // 2
+            links.append((low, middle, high))
+            if low < middle:
+                stack.append((low, middle - 1))
+            if middle < high:
+                stack.append((middle + 1, high))
+        for low, middle, high in reversed(links):
+            node = nodes[middle]
+            node.left = nodes[(low + middle - 1) // 2] if low < middle else None
+            node.right = nodes[(middle + 1 + high) // 2] if middle < high else None
+            node.height = 1 + max(node.left.height if node.left else 0,
+                                  node.right.height if node.right else 0)
+        tree.root = nodes[(len(nodes) - 1) // 2]
+        return tree
+    
     def insert(self, key, value):
         """Insert new key and value into tree"""
         if self.root is None:
@@ -50,6 +105,48 @@ class BinarySearchTree:
                     return
                 current = current.right
     
+    def remove(self, key, value):
+        """Remove value stored under key; the node is deleted with its last value
+        
+        Returns True if the value was found.
+        """
+        path = []
+        current = self.root
+        while current is not None and key != current.key:
+            path.append(current)
+            current = current.left if key < current.key else current.right
+        if current is None or not current.remove_value(value):
+            return False
+        if not current.value:
+            self._delete_node(path, current)
+        return True
+    
+    def _delete_node(self, path, node):
+        """Unlink node; path holds its ancestors from the root down"""
+        if node.left is not None and node.right is not None:
+            # Two children: move the in-order successor's contents here, unlink the successor
+            path.append(node)
+            successor = node.right
+            while successor.left is not None:
+                path.append(successor)
+                successor = successor.left
+            node.key, node.value, node.value_ids = successor.key, successor.value, successor.value_ids
+            node = successor
+        
+        child = node.left if node.left is not None else node.right
+        parent = path[-1] if path else None
+        if parent is None:
+            self.root = child
+        elif parent.left is node:
+            parent.left = child
+        else:
+            parent.right = child
+        self.size -= 1
+        self._after_delete(path)
+    
+    def _after_delete(self, path):
+        """Hook for subclasses to restore balance along path after a deletion"""
+    
     def find(self, key):
         """Find values with the specified key"""
         current = self.root
@@ -69,40 +166,180 @@ class BinarySearchTree:
         if result is None:
             result = []
         
-        if node is None:
-            return result
-        
-        # First left subtree
-        self.in_order_traversal(node.left, result)
-        
-        # Current node
-        for value in node.value:
-            result.append(value)
-        
-        # Then right subtree
-        self.in_order_traversal(node.right, result)
+        # Iterative traversal with an explicit stack (no recursion limit)
+        stack = []
+        current = node
+        while stack or current is not None:
+            # First left subtree
+            while current is not None:
+                stack.append(current)
+                current = current.left
+            current = stack.pop()
+            
+            # Current node
+            result.extend(current.value)
+            
+            # Then right subtree
+            current = current.right
         
         return result
     
     def find_range(self, min_key, max_key):
         """Find all properties in the specified price range"""
         result = []
-        self._find_range_helper(self.root, min_key, max_key, result)
+        stack = []
+        current = self.root
+        while stack or current is not None:
+            # Go left only while smaller keys can still be in range
+            while current is not None:
+                stack.append(current)
+                current = current.left if min_key < current.key else None
+            node = stack.pop()
+            
+            # Add current node if it's in range
+            if min_key <= node.key <= max_key:
+                result.extend(node.value)
+            
+            # Go right only while larger keys can still be in range
+            current = node.right if node.key < max_key else None
         return result
     
-    def _find_range_helper(self, node, min_key, max_key, result):
-        """Helper function for range search"""
-        if node is None:
+    def height(self):
+        """Return tree height (number of nodes on the longest root-leaf path)"""
+        if self.root is None:
+            return 0
+        height = 0
+        level = [self.root]
+        while level:
+            height += 1
+            level = [child for node in level for child in (node.left, node.right) if child]
+        return height
+    
+    def stats(self):
+        """Return height and balance statistics of the tree"""
+        height = self.height()
+        optimal_height = self.size.bit_length()  # ceil(log2(size + 1))
+        return {
+            'size': self.size,
+            'height': height,
+            'optimal_height': optimal_height,
+            'height_ratio': height / optimal_height if optimal_height else 1.0,
+        }
+
+
+class BalancedBinarySearchTree(BinarySearchTree):
+    """Self-balancing (AVL) binary search tree with the BinarySearchTree API
+
+    Heights of the two subtrees of every node differ by at most one, so
+    insert, find and find_range stay O(log n) even for sorted input.
+    """
+    
+    @staticmethod
+    def _height(node):
+        """Height of a subtree, 0 for an empty one"""
+        return node.height if node is not None else 0
+    
+    def _update(self, node):
+        """Recompute node height from its children"""
+        node.height = 1 + max(self._height(node.left), self._height(node.right))
+    
+    def _balance_factor(self, node):
+        """Left height minus right height"""
+        return self._height(node.left) - self._height(node.right)
+    
+    def _rotate_right(self, node):
+        """Rotate subtree right and return its new root"""
+        pivot = node.left
+        node.left = pivot.right
+        pivot.right = node
+        self._update(node)
+        self._update(pivot)
+        return pivot
+    
+    def _rotate_left(self, node):
+        """Rotate subtree left and return its new root"""
+        pivot = node.right
+        node.right = pivot.left
+        pivot.left = node
+        self._update(node)
+        self._update(pivot)
+        return pivot
+    
+    def _rebalance(self, node):
+        """Restore the AVL property at node and return the subtree root"""
+        self._update(node)
+        balance = self._balance_factor(node)
+        if balance > 1:
+            if self._balance_factor(node.left) < 0:
+                node.left = self._rotate_left(node.left)
+            return self._rotate_right(node)
+        if balance < -1:
+            if self._balance_factor(node.right) > 0:
+                node.right = self._rotate_right(node.right)
+            return self._rotate_left(node)
+        return node
+    
+    def insert(self, key, value):
+        """Insert new key and value into tree, rebalancing on the way back up"""
+        if self.root is None:
+            self.root = BSTNode(key, [value])
+            self.size += 1
             return
         
-        # If current node is in range, check left subtree
-        if min_key < node.key:
-            self._find_range_helper(node.left, min_key, max_key, result)
+        path = []
+        current = self.root
+        while current is not None:
+            if key == current.key:
+                # If key already exists, add new value (tree shape unchanged)
+                current.add_value(value)
+                return
+            path.append(current)
+            current = current.left if key < current.key else current.right
         
-        # Add current node if it's in range
-        if min_key <= node.key <= max_key:
-            result.extend(node.value)
+        parent = path[-1]
+        if key < parent.key:
+            parent.left = BSTNode(key, [value])
+        else:
+            parent.right = BSTNode(key, [value])
+        self.size += 1
         
-        # If current node is in range, check right subtree
-        if node.key < max_key:
-            self._find_range_helper(node.right, min_key, max_key, result)
\ No newline at end of file
+        # Walk back to the root, rebalancing and re-linking rotated subtrees
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            old_height = node.height
+            subtree = self._rebalance(node)
+            if i == 0:
+                self.root = subtree
+            elif path[i - 1].left is node:
+                path[i - 1].left = subtree
+            else:
+                path[i - 1].right = subtree
+            if subtree is node and node.height == old_height:
+                break  # Heights above are unchanged
+    
+    def _after_delete(self, path):
+        """Rebalance the ancestors of a deleted node, bottom up"""
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            old_height = node.height
+            subtree = self._rebalance(node)
+            if i == 0:
+                self.root = subtree
+            elif path[i - 1].left is node:
+                path[i - 1].left = subtree
+            else:
+                path[i - 1].right = subtree
+            if subtree is node and node.height == old_height:
+                break  # Heights above are unchanged
+    
+    def stats(self):
+        """Return height and balance statistics of the tree"""
+        stats = super().stats()
+        max_imbalance = 0
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            max_imbalance = max(max_imbalance, abs(self._balance_factor(node)))
+            stack.extend(child for child in (node.left, node.right) if child)
+        stats['max_imbalance'] = max_imbalance
+        return stats
@@ -1,10 +1,78 @@
+import heapq
+
+
+def _price(item):
+    """Default heap key"""
+    return item.price
+
+
+class _Reversed:
+    """Reverses the ordering of a key (lets max-heap walks use heapq)"""
+    
+    __slots__ = ('key',)
+    
+    def __init__(self, key):
+        self.key = key
+    
+    def __lt__(self, other):
+        return other.key < self.key
+    
+    def __eq__(self, other):
+        return self.key == other.key
+
+
+def _ordered_walk(keys, items, size, reverse=False):
+    """Yield heap items in key order without modifying the heap
+    
+    Keeps a small frontier heap of candidate indices: the root first, then
+    the children of every yielded node. Getting k items costs O(k log k).
+    """
+    if size <= 0:
+        return
+    wrap = _Reversed if reverse else (lambda key: key)
+    frontier = [(wrap(keys[0]), 0)]
+    while frontier:
+        _, i = heapq.heappop(frontier)
+        yield items[i]
+        for child in (2 * i + 1, 2 * i + 2):
+            if child < size:
+                heapq.heappush(frontier, (wrap(keys[child]), child))
+
+
+def _remove_item(heap, item):
+    """Remove item from a MinHeap/MaxHeap: position lookup, then one sift"""
+    i = heap.positions.pop(id(item), None)
+    if i is None:
+        return False
+    last = heap.size - 1
+    if i < last:
+        heap.heap[i], heap.keys[i] = heap.heap[last], heap.keys[last]
+        heap.positions[id(heap.heap[i])] = i
+    heap.heap.pop()
+    heap.keys.pop()
+    heap.size -= 1
+    if i < heap.size:
+        # The moved element may belong above or below its new position
+        heap._heapify_up(i)
+        heap._heapify_down(i)
+    return True
+
+
 class MinHeap:
-    """Min-Heap data structure for sorting properties by minimum price"""
+    """Min-Heap data structure for sorting properties by minimum price
     
-    def __init__(self):
+    The ordering key defaults to the price and can be any key function.
+    Keys are computed once per item and stored next to it in self.keys;
+    self.positions maps id(item) to its index, so remove is O(log n).
+    """
+    
+    def __init__(self, key=None):
         """Initialize empty Min-Heap"""
         self.heap = []
+        self.keys = []  # keys[i] is the cached key of heap[i]
+        self.positions = {}  # id(item) -> index of item in heap
         self.size = 0
+        self.key = key if key else _price
     
     def parent(self, i):
         """Return parent index"""
@@ -30,11 +98,15 @@ class MinHeap:
             return None
         
         min_item = self.heap[0]
+        del self.positions[id(min_item)]
         self.heap[0] = self.heap[self.size - 1]
+        self.keys[0] = self.keys[self.size - 1]
         self.size -= 1
         self.heap.pop()
+        self.keys.pop()
         
         if self.size > 0:
+            self.positions[id(self.heap[0])] = 0
             self._heapify_down(0)
         
         return min_item
@@ -42,48 +114,95 @@ class MinHeap:
     def insert(self, item):
         """Insert new element into heap"""
         self.heap.append(item)
+        self.keys.append(self.key(item))
+        self.positions[id(item)] = self.size
         self.size += 1
         self._heapify_up(self.size - 1)
     
+    def remove(self, item):
+        """Remove item (the same object) in O(log n), return whether it was found"""
+        return _remove_item(self, item)
+    
+    def peek_k(self, k):
+        """Return the k smallest elements in order, without removing them"""
+        result = []
+        for item in self:
+            if len(result) >= k:
+                break
+            result.append(item)
+        return result
+    
+    def __iter__(self):
+        """Iterate elements from smallest to largest without removing them"""
+        return _ordered_walk(self.keys, self.heap, self.size)
+    
+    @classmethod
+    def from_iterable(cls, items, key=None):
+        """Build heap from items in O(n) with bottom-up heapify"""
+        heap = cls(key)
+        heap.heap = list(items)
+        heap.keys = [heap.key(item) for item in heap.heap]
+        heap.positions = {id(item): i for i, item in enumerate(heap.heap)}
+        heap.size = len(heap.heap)
+        for i in range(heap.size // 2 - 1, -1, -1):
+            heap._heapify_down(i)
+        return heap
+    
     def _heapify_up(self, i):
         """Move element up to maintain heap property"""
-        parent_idx = self.parent(i)
-        
-        # If we're at root node or element is already in correct position
-        if i == 0 or self.heap[parent_idx].price <= self.heap[i].price:
-            return
+        heap, keys, positions = self.heap, self.keys, self.positions
+        item, key = heap[i], keys[i]
         
-        # Swap with parent and continue
-        self.heap[i], self.heap[parent_idx] = self.heap[parent_idx], self.heap[i]
-        self._heapify_up(parent_idx)
+        # Shift larger parents down until the item's position is found
+        while i > 0:
+            parent_idx = self.parent(i)
+            if keys[parent_idx] <= key:
+                break
+            heap[i], keys[i] = heap[parent_idx], keys[parent_idx]
+            positions[id(heap[i])] = i
+            i = parent_idx
+        heap[i], keys[i] = item, key
+        positions[id(item)] = i
     
     def _heapify_down(self, i):
         """Move element down to maintain heap property"""
-        min_idx = i
-        left_idx = self.left_child(i)
-        right_idx = self.right_child(i)
-        
-        # Check if left child is smaller
-        if left_idx < self.size and self.heap[left_idx].price < self.heap[min_idx].price:
-            min_idx = left_idx
-        
-        # Check if right child is smaller
-        if right_idx < self.size and self.heap[right_idx].price < self.heap[min_idx].price:
-            min_idx = right_idx
-        
-        # If minimum is not current, swap and continue
-        if min_idx != i:
-            self.heap[i], self.heap[min_idx] = self.heap[min_idx], self.heap[i]
-            self._heapify_down(min_idx)
+        heap, keys, positions = self.heap, self.keys, self.positions
+        item, key = heap[i], keys[i]
+        while True:
+            min_idx = self.left_child(i)
+            if min_idx >= self.size:
+                break
+            
+            # Pick the smaller child
+            right_idx = min_idx + 1
+            if right_idx < self.size and keys[right_idx] < keys[min_idx]:
+                min_idx = right_idx
+            
+            # Stop when that child is not smaller than the item, otherwise shift it up
+            if not keys[min_idx] < key:
+                break
+            heap[i], keys[i] = heap[min_idx], keys[min_idx]
+            positions[id(heap[i])] = i
+            i = min_idx
+        heap[i], keys[i] = item, key
+        positions[id(item)] = i
 
 
 class MaxHeap:
-    """Max-Heap data structure for sorting properties by maximum price"""
+    """Max-Heap data structure for sorting properties by maximum price
+    
+    The ordering key defaults to the price and can be any key function.
+    Keys are computed once per item and stored next to it in self.keys;
+    self.positions maps id(item) to its index, so remove is O(log n).
+    """
     
-    def __init__(self):
+    def __init__(self, key=None):
         """Initialize empty Max-Heap"""
         self.heap = []
+        self.keys = []  # keys[i] is the cached key of heap[i]
+        self.positions = {}  # id(item) -> index of item in heap
         self.size = 0
+        self.key = key if key else _price
     
     def parent(self, i):
         """Return parent index"""
@@ -109,11 +228,15 @@ class MaxHeap:
             return None
         
         max_item = self.heap[0]
+        del self.positions[id(max_item)]
         self.heap[0] = self.heap[self.size - 1]
+        self.keys[0] = self.keys[self.size - 1]
         self.size -= 1
         self.heap.pop()
+        self.keys.pop()
         
         if self.size > 0:
+            self.positions[id(self.heap[0])] = 0
             self._heapify_down(0)
         
         return max_item
@@ -121,36 +244,75 @@ class MaxHeap:
     def insert(self, item):
         """Insert new element into heap"""
         self.heap.append(item)
+        self.keys.append(self.key(item))
+        self.positions[id(item)] = self.size
         self.size += 1
         self._heapify_up(self.size - 1)
     
+    def remove(self, item):
+        """Remove item (the same object) in O(log n), return whether it was found"""
+        return _remove_item(self, item)
+    
+    def peek_k(self, k):
+        """Return the k largest elements in order, without removing them"""
+        result = []
+        for item in self:
+            if len(result) >= k:
+                break
+            result.append(item)
+        return result
+    
+    def __iter__(self):
+        """Iterate elements from largest to smallest without removing them"""
+        return _ordered_walk(self.keys, self.heap, self.size, reverse=True)
+    
+    @classmethod
+    def from_iterable(cls, items, key=None):
+        """Build heap from items in O(n) with bottom-up heapify"""
+        heap = cls(key)
+        heap.heap = list(items)
+        heap.keys = [heap.key(item) for item in heap.heap]
+        heap.positions = {id(item): i for i, item in enumerate(heap.heap)}
+        heap.size = len(heap.heap)
+        for i in range(heap.size // 2 - 1, -1, -1):
+            heap._heapify_down(i)
+        return heap
+    
     def _heapify_up(self, i):
         """Move element up to maintain heap property"""
-        parent_idx = self.parent(i)
+        heap, keys, positions = self.heap, self.keys, self.positions
+        item, key = heap[i], keys[i]
         
-        # If we're at root node or element is already in correct position
-        if i == 0 or self.heap[parent_idx].price >= self.heap[i].price:
-            return
-        
-        # Swap with parent and continue
-        self.heap[i], self.heap[parent_idx] = self.heap[parent_idx], self.heap[i]
-        self._heapify_up(parent_idx)
+        # Shift smaller parents down until the item's position is found
+        while i > 0:
+            parent_idx = self.parent(i)
+            if keys[parent_idx] >= key:
+                break
+            heap[i], keys[i] = heap[parent_idx], keys[parent_idx]
+            positions[id(heap[i])] = i
+            i = parent_idx
+        heap[i], keys[i] = item, key
+        positions[id(item)] = i
     
     def _heapify_down(self, i):
         """Move element down to maintain heap property"""
-        max_idx = i
-        left_idx = self.left_child(i)
-        right_idx = self.right_child(i)
-        
-        # Check if left child is larger
-        if left_idx < self.size and self.heap[left_idx].price > self.heap[max_idx].price:
-            max_idx = left_idx
-        
-        # Check if right child is larger
-        if right_idx < self.size and self.heap[right_idx].price > self.heap[max_idx].price:
-            max_idx = right_idx
-        
-        # If maximum is not current, swap and continue
-        if max_idx != i:
-            self.heap[i], self.heap[max_idx] = self.heap[max_idx], self.heap[i]
-            self._heapify_down(max_idx)
\ No newline at end of file
+        heap, keys, positions = self.heap, self.keys, self.positions
+        item, key = heap[i], keys[i]
+        while True:
+            max_idx = self.left_child(i)
+            if max_idx >= self.size:
+                break
+            
+            # Pick the larger child
+            right_idx = max_idx + 1
+            if right_idx < self.size and keys[right_idx] > keys[max_idx]:
+                max_idx = right_idx
+            
+            # Stop when that child is not larger than the item, otherwise shift it up
+            if not keys[max_idx] > key:
+                break
+            heap[i], keys[i] = heap[max_idx], keys[max_idx]
+            positions[id(heap[i])] = i
+            i = max_idx
+        heap[i], keys[i] = item, key
+        positions[id(item)] = i
@@ -1,13 +1,49 @@
+from data_structures.heap import _ordered_walk
+
+
+class _ComparatorKey:
+    """Sort key that orders items with a comparator(x, y) -> x before y"""
+    
+    __slots__ = ('item', 'comparator')
+    
+    def __init__(self, item, comparator):
+        self.item = item
+        self.comparator = comparator
+    
+    def __lt__(self, other):
+        return self.comparator(self.item, other.item)
+
+
 class PriorityQueue:
-    """Priority queue for sorting properties by multiple criteria"""
+    """Indexed priority queue for sorting properties by multiple criteria
+    
+    Items are keyed by their id (Property.id by default). A position map from
+    id to heap index makes contains O(1) and update_priority / remove
+    O(log n), so listing changes can be applied without rebuilding the queue.
     
-    def __init__(self, comparator=None):
+    Priority is given either by a key function (smaller key = higher
+    priority, e.g. key=lambda p: (not p.utilities_included, p.price)) or by
+    a comparator(x, y) returning True when x goes first. Keys are computed
+    once per item and cached in self.keys; the key form avoids a Python
+    comparator call on every comparison.
+    """
+    
+    def __init__(self, comparator=None, id_key=None, key=None):
         """Initialize empty priority queue"""
         self.queue = []
+        self.keys = []  # keys[i] is the cached priority key of queue[i]
         self.size = 0
+        self.positions = {}  # Item id -> index in self.queue
         
-        # If comparator not specified, use default (lower price = higher priority)
-        self.comparator = comparator if comparator else lambda x, y: x.price < y.price
+        # If neither is specified, use default (lower price = higher priority)
+        self.comparator = comparator
+        if key:
+            self.key = key
+        elif comparator:
+            self.key = lambda item: _ComparatorKey(item, comparator)
+        else:
+            self.key = lambda item: item.price
+        self.id_key = id_key if id_key else lambda item: item.id
     
     def parent(self, i):
         """Return parent index"""
@@ -21,6 +57,10 @@ class PriorityQueue:
         """Return right child index"""
         return 2 * i + 2
     
+    def is_empty(self):
+        """Whether the queue has no elements"""
+        return self.size == 0
+    
     def get_top(self):
         """Return element with highest priority without removing it"""
         if self.size <= 0:
@@ -31,50 +71,144 @@ class PriorityQueue:
         """Remove and return element with highest priority"""
         if self.size <= 0:
             return None
-        
-        top_item = self.queue[0]
-        self.queue[0] = self.queue[self.size - 1]
-        self.size -= 1
-        self.queue.pop()
-        
-        if self.size > 0:
-            self._heapify_down(0)
-        
-        return top_item
+        return self._remove_at(0)
+    
+    # Short names used by main()
+    peek = get_top
+    extract = extract_top
     
     def insert(self, item):
-        """Insert new element into queue"""
+        """Insert new element into queue (replaces an element with the same id)"""
+        if self.id_key(item) in self.positions:
+            self.update_priority(item)
+            return
         self.queue.append(item)
+        self.keys.append(self.key(item))
         self.size += 1
         self._heapify_up(self.size - 1)
     
+    def peek_k(self, k):
+        """Return the k highest-priority elements in order, without removing them"""
+        result = []
+        for item in self:
+            if len(result) >= k:
+                break
+            result.append(item)
+        return result
+    
+    def __iter__(self):
+        """Iterate elements by priority without removing them"""
+        return _ordered_walk(self.keys, self.queue, self.size)
+    
+    def contains(self, item_id):
+        """Whether an element with the given id is in the queue"""
+        return item_id in self.positions
+    
+    def get(self, item_id):
+        """Return the element with the given id, or None"""
+        index = self.positions.get(item_id)
+        return self.queue[index] if index is not None else None
+    
+    def update_priority(self, item):
+        """Replace the element with item's id by item and restore heap order
+        
+        Also works when the stored element itself was changed (e.g. its
+        price), in which case the same object is passed in.
+        """
+        index = self.positions.get(self.id_key(item))
+        if index is None:
+            raise KeyError(self.id_key(item))
+        self.queue[index] = item
+        self.keys[index] = self.key(item)
+        self._restore(index)
+    
+    def remove(self, item_id):
+        """Remove and return the element with the given id"""
+        index = self.positions.get(item_id)
+        if index is None:
+            raise KeyError(item_id)
+        return self._remove_at(index)
+    
+    @classmethod
+    def from_iterable(cls, items, comparator=None, id_key=None, key=None):
+        """Build queue from items in O(n) with bottom-up heapify"""
+        queue = cls(comparator, id_key, key)
+        for item in items:
+            item_id = queue.id_key(item)
+            if item_id in queue.positions:
+                queue.queue[queue.positions[item_id]] = item
+            else:
+                queue.positions[item_id] = len(queue.queue)
+                queue.queue.append(item)
+        queue.keys = [queue.key(item) for item in queue.queue]
+        queue.size = len(queue.queue)
+        for i in range(queue.size // 2 - 1, -1, -1):
+            queue._heapify_down(i)
+        return queue
+    
+    def _remove_at(self, index):
+        """Remove the element at a heap index, moving the last element into its place"""
+        removed = self.queue[index]
+        del self.positions[self.id_key(removed)]
+        last = self.queue.pop()
+        last_key = self.keys.pop()
+        self.size -= 1
+        if index < self.size:
+            self.queue[index] = last
+            self.keys[index] = last_key
+            self._restore(index)
+        return removed
+    
+    def _restore(self, i):
+        """Move element at i up or down, whichever restores heap order"""
+        if i > 0 and self.keys[i] < self.keys[self.parent(i)]:
+            self._heapify_up(i)
+        else:
+            self._heapify_down(i)
+    
     def _heapify_up(self, i):
         """Move element up to maintain heap property"""
-        parent_idx = self.parent(i)
-        
-        # If we're at root node or element is already in correct position
-        if i == 0 or self.comparator(self.queue[parent_idx], self.queue[i]):
-            return
+        queue, keys = self.queue, self.keys
+        positions = self.positions
+        item, key = queue[i], keys[i]
         
-        # Swap with parent and continue
-        self.queue[i], self.queue[parent_idx] = self.queue[parent_idx], self.queue[i]
-        self._heapify_up(parent_idx)
+        # Shift lower-priority parents down until the item's position is found
+        while i > 0:
+            parent_idx = self.parent(i)
+            if keys[parent_idx] < key:
+                break
+            queue[i], keys[i] = queue[parent_idx], keys[parent_idx]
+            positions[self.id_key(queue[i])] = i
+            i = parent_idx
+        queue[i], keys[i] = item, key
+        positions[self.id_key(item)] = i
     
     def _heapify_down(self, i):
         """Move element down to maintain heap property"""
-        top_idx = i
-        left_idx = self.left_child(i)
-        right_idx = self.right_child(i)
-        
-        # Check if left child has higher priority
-        if left_idx < self.size and self.comparator(self.queue[left_idx], self.queue[top_idx]):
-            top_idx = left_idx
-        
-        # Check if right child has higher priority
-        if right_idx < self.size and self.comparator(self.queue[right_idx], self.queue[top_idx]):
-            top_idx = right_idx
-        
-        # If highest priority is not current, swap and continue
-        if top_idx != i:
-            self.queue[i], self.queue[top_idx] = self.queue[top_idx], self.queue[i]
-            self._heapify_down(top_idx)
\ No newline at end of file
+        queue, keys = self.queue, self.keys
+        positions = self.positions
+        item, key = queue[i], keys[i]
+        while True:
+            top_idx = i
+            top_key = key
+            left_idx = self.left_child(i)
+            right_idx = left_idx + 1
+            
+            # Check if left child has higher priority
+            if left_idx < self.size and keys[left_idx] < top_key:
+                top_idx = left_idx
+                top_key = keys[left_idx]
+            
+            # Check if right child has higher priority
+            if right_idx < self.size and keys[right_idx] < top_key:
+                top_idx = right_idx
+                top_key = keys[right_idx]
+            
+            # Stop when highest priority is current, otherwise move child up and continue
+            if top_idx == i:
+                break
+            queue[i], keys[i] = queue[top_idx], top_key
+            positions[self.id_key(queue[i])] = i
+            i = top_idx
+        queue[i], keys[i] = item, key
+        positions[self.id_key(item)] = i
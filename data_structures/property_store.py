@@ -0,0 +1,184 @@
+import sys
+from array import array
+from property import Property
+
+# Sentinel for missing integer values (rooms, floor, time to center)
+MISSING_INT = -2**31
+
+
+def _to_int(value):
+    """Integer column value, MISSING_INT for None"""
+    return MISSING_INT if value is None else int(value)
+
+
+def _from_int(value):
+    """Inverse of _to_int"""
+    return None if value == MISSING_INT else value
+
+
+def _to_float(value):
+    """Float column value, NaN for None"""
+    return float('nan') if value is None else float(value)
+
+
+def _from_float(value):
+    """Inverse of _to_float"""
+    return None if value != value else value
+
+
+def _to_flag(value):
+    """Tri-state flag column value: -1 for None, 0 for False, 1 for True"""
+    return -1 if value is None else int(bool(value))
+
+
+def _from_flag(value):
+    """Inverse of _to_flag"""
+    return None if value < 0 else bool(value)
+
+
+def _intern(value):
+    """Intern repeated strings so equal values share one object"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class PropertyStore:
+    """Columnar storage for many properties
+
+    Numeric fields are kept in typed arrays. Fields with many repeated values
+    (address, portal, dates, ...) are dictionary-encoded: the column holds
+    integer codes into a list of distinct values. Other strings are interned.
+    Indexing or iterating the store hands out regular Property objects.
+    """
+
+    FLOAT_COLUMNS = ('price', 'size', 'distance_to_center', 'latitude', 'longitude')
+    INT_COLUMNS = ('rooms', 'floor', 'time_to_center')
+    FLAG_COLUMNS = ('has_furniture', 'utilities_included', 'has_parking', 'pets_allowed')
+    CATEGORY_COLUMNS = ('address', 'bathroom', 'portal', 'published_date', 'min_rent_term', 'region')
+    STRING_COLUMNS = ('id', 'title', 'source_url', 'description')
+
+    def __init__(self, properties=None):
+        """Initialize store, optionally filled with properties"""
+        self.columns = {}
+        for name in self.FLOAT_COLUMNS:
+            self.columns[name] = array('d')
+        for name in self.INT_COLUMNS:
+            self.columns[name] = array('i')
+        for name in self.FLAG_COLUMNS:
+            self.columns[name] = array('b')
+        self.categories = {}     # Column name -> list of distinct values
+        self.category_codes = {}  # Column name -> {value: code}
+        for name in self.CATEGORY_COLUMNS:
+            self.columns[name] = array('i')
+            self.categories[name] = []
+            self.category_codes[name] = {}
+        for name in self.STRING_COLUMNS:
+            self.columns[name] = []
+        self.columns['kitchen_equipment'] = []
+        self.id_index = {}  # Property id -> row number
+
+        if properties:
+            self.extend(properties)
+
+    def __len__(self):
+        return len(self.columns['price'])
+
+    def _encode(self, name, value):
+        """Return the code of value in a category column, adding it if new"""
+        codes = self.category_codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.categories[name])
+            self.categories[name].append(_intern(value))
+        return code
+
+    def _decode(self, name, row):
+        """Return the value stored in a category column"""
+        return self.categories[name][self.columns[name][row]]
+
+    def __getitem__(self, row):
+        """Return the property in a row as a Property object"""
+        if row < 0:
+            row += len(self)
+        columns = self.columns
+        prop = Property(
+            id=columns['id'][row],
+            title=columns['title'][row],
+            price=columns['price'][row],
+            address=self._decode('address', row),
+            size=columns['size'][row],
+            rooms=_from_int(columns['rooms'][row]),
+            floor=_from_int(columns['floor'][row]),
+            has_furniture=_from_flag(columns['has_furniture'][row]),
+            kitchen_equipment=list(columns['kitchen_equipment'][row]),
+            bathroom=self._decode('bathroom', row),
+            utilities_included=_from_flag(columns['utilities_included'][row]),
+            source_url=columns['source_url'][row],
+            portal=self._decode('portal', row),
+            published_date=self._decode('published_date', row),
+            has_parking=_from_flag(columns['has_parking'][row]),
+            pets_allowed=_from_flag(columns['pets_allowed'][row]),
+            min_rent_term=self._decode('min_rent_term', row),
+            description=columns['description'][row],
+            region=self._decode('region', row)
+        )
+        prop.distance_to_center = _from_float(columns['distance_to_center'][row])
+        prop.time_to_center = _from_int(columns['time_to_center'][row])
+        prop.latitude = _from_float(columns['latitude'][row])
+        prop.longitude = _from_float(columns['longitude'][row])
+        return prop
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def column(self, name):
+        """Return the raw column (typed array, code array or list) for a field"""
+        return self.columns[name]
+
+    def append(self, prop):
+        """Add a property, or overwrite the row of a property with the same id"""
+        row = self.id_index.get(prop.id)
+        if row is not None:
+            self.update(row, prop)
+            return row
+
+        row = len(self)
+        columns = self.columns
+        for name in self.FLOAT_COLUMNS:
+            columns[name].append(_to_float(getattr(prop, name)))
+        for name in self.INT_COLUMNS:
+            columns[name].append(_to_int(getattr(prop, name)))
+        for name in self.FLAG_COLUMNS:
+            columns[name].append(_to_flag(getattr(prop, name)))
+        for name in self.CATEGORY_COLUMNS:
+            columns[name].append(self._encode(name, getattr(prop, name)))
+        for name in self.STRING_COLUMNS:
+            columns[name].append(_intern(getattr(prop, name)))
+        columns['kitchen_equipment'].append(tuple(_intern(item) for item in prop.kitchen_equipment))
+        self.id_index[prop.id] = row
+        return row
+
+    def extend(self, properties):
+        """Add many properties"""
+        for prop in properties:
+            self.append(prop)
+
+    def update(self, row, prop):
+        """Overwrite a row with the values of prop"""
+        columns = self.columns
+        for name in self.FLOAT_COLUMNS:
+            columns[name][row] = _to_float(getattr(prop, name))
+        for name in self.INT_COLUMNS:
+            columns[name][row] = _to_int(getattr(prop, name))
+        for name in self.FLAG_COLUMNS:
+            columns[name][row] = _to_flag(getattr(prop, name))
+        for name in self.CATEGORY_COLUMNS:
+            columns[name][row] = self._encode(name, getattr(prop, name))
+        for name in self.STRING_COLUMNS:
+            columns[name][row] = _intern(getattr(prop, name))
+        columns['kitchen_equipment'][row] = tuple(_intern(item) for item in prop.kitchen_equipment)
+
+    def find(self, property_id):
+        """Return the property with the given id, or None"""
+        row = self.id_index.get(property_id)
+        return self[row] if row is not None else None
@@ -0,0 +1,149 @@
+import math
+
+EARTH_RADIUS_KM = 6371
+
+# Kilometres per degree, with longitude scaled at Riga's latitude
+KM_PER_DEGREE_LAT = 110.574
+KM_PER_DEGREE_LNG = 111.320 * math.cos(math.radians(56.95))
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometres"""
+    dlat = math.radians(lat2 - lat1)
+    dlng = math.radians(lng2 - lng1)
+    a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlng/2)**2
+    return EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+
+
+class SpatialGrid:
+    """Uniform grid index over geocoded properties
+    
+    Points are bucketed into square cells of cell_size_km. Radius queries
+    only look at cells overlapping the search circle, and nearest-neighbour
+    queries search rings of cells outwards from the query point.
+    """
+    
+    def __init__(self, cell_size_km=0.5):
+        """Initialize empty grid"""
+        self.cell_size_km = cell_size_km
+        self.cells = {}      # (cell x, cell y) -> {item id: (lat, lng, item)}
+        self.item_cells = {}  # Item id -> cell
+        self.bounds = None    # (min x, max x, min y, max y) of cells ever used
+        self.size = 0
+    
+    @classmethod
+    def from_properties(cls, properties, cell_size_km=0.5):
+        """Index all properties that have coordinates"""
+        grid = cls(cell_size_km)
+        for prop in properties:
+            if prop.latitude is not None and prop.longitude is not None:
+                grid.insert(prop.latitude, prop.longitude, prop)
+        return grid
+    
+    def _cell(self, lat, lng):
+        """Return the grid cell containing a point"""
+        return (math.floor(lng * KM_PER_DEGREE_LNG / self.cell_size_km),
+                math.floor(lat * KM_PER_DEGREE_LAT / self.cell_size_km))
+    
+    def insert(self, lat, lng, item, item_id=None):
+        """Add (or move) an item at the given coordinates"""
+        item_id = item.id if item_id is None else item_id
+        if item_id in self.item_cells:
+            self.remove(item_id)
+        cell = self._cell(lat, lng)
+        if self.bounds is None:
+            self.bounds = (cell[0], cell[0], cell[1], cell[1])
+        else:
+            min_x, max_x, min_y, max_y = self.bounds
+            self.bounds = (min(min_x, cell[0]), max(max_x, cell[0]), min(min_y, cell[1]), max(max_y, cell[1]))
+        self.cells.setdefault(cell, {})[item_id] = (lat, lng, item)
+        self.item_cells[item_id] = cell
+        self.size += 1
+    
+    def get(self, item_id):
+        """Return the indexed item with this id, or None"""
+        cell = self.item_cells.get(item_id)
+        return self.cells[cell][item_id][2] if cell is not None else None
+    
+    def remove(self, item_id):
+        """Remove an item, returns False if it was not indexed"""
+        cell = self.item_cells.pop(item_id, None)
+        if cell is None:
+            return False
+        bucket = self.cells[cell]
+        del bucket[item_id]
+        if not bucket:
+            del self.cells[cell]
+        self.size -= 1
+        return True
+    
+    def within_radius(self, lat, lng, radius_km):
+        """Return [(distance km, item)] within radius_km of a point, nearest first"""
+        if self.size == 0:
+            return []
+        cx, cy = self._cell(lat, lng)
+        # One extra ring absorbs the projection error away from Riga's latitude
+        reach = math.ceil(radius_km / self.cell_size_km) + 1
+        min_x, max_x, min_y, max_y = self.bounds
+        x_range = range(max(cx - reach, min_x), min(cx + reach, max_x) + 1)
+        y_range = range(max(cy - reach, min_y), min(cy + reach, max_y) + 1)
+        if len(x_range) * len(y_range) > len(self.cells):
+            # Search area larger than the occupied cells: visit those instead
+            cells = [bucket for (x, y), bucket in self.cells.items() if x in x_range and y in y_range]
+        else:
+            cells = [self.cells[cell] for cell in ((x, y) for x in x_range for y in y_range) if cell in self.cells]
+        
+        result = []
+        for bucket in cells:
+            for item_lat, item_lng, item in bucket.values():
+                distance = haversine_km(lat, lng, item_lat, item_lng)
+                if distance <= radius_km:
+                    result.append((distance, item))
+        result.sort(key=lambda pair: pair[0])
+        return result
+    
+    def nearest(self, lat, lng, k=1):
+        """Return the k nearest [(distance km, item)] to a point, nearest first"""
+        if self.size == 0 or k <= 0:
+            return []
+        
+        cx, cy = self._cell(lat, lng)
+        min_x, max_x, min_y, max_y = self.bounds
+        max_ring = max(abs(cx - min_x), abs(cx - max_x), abs(cy - min_y), abs(cy - max_y))
+        
+        candidates = []
+        for ring in range(max_ring + 1):
+            if 8 * ring > len(self.cells):
+                # The ring has more cells than are occupied (a far or sparse
+                # query): take every occupied cell not searched yet and stop
+                for (x, y), bucket in self.cells.items():
+                    if max(abs(x - cx), abs(y - cy)) >= ring:
+                        candidates.extend((haversine_km(lat, lng, item_lat, item_lng), item)
+                                          for item_lat, item_lng, item in bucket.values())
+                break
+            for cell in self._ring_cells(cx, cy, ring):
+                for item_lat, item_lng, item in self.cells.get(cell, {}).values():
+                    candidates.append((haversine_km(lat, lng, item_lat, item_lng), item))
+            
+            # Cells beyond this ring are at least ring * cell_size_km away
+            # (less a margin for the projection error)
+            if len(candidates) >= k:
+                candidates.sort(key=lambda pair: pair[0])
+                if candidates[k - 1][0] <= ring * self.cell_size_km * 0.9:
+                    break
+        
+        candidates.sort(key=lambda pair: pair[0])
+        return candidates[:k]
+    
+    @staticmethod
+    def _ring_cells(cx, cy, ring):
+        """Cells on the square ring at Chebyshev distance ring from (cx, cy)"""
+        if ring == 0:
+            yield (cx, cy)
+            return
+        for x in range(cx - ring, cx + ring + 1):
+            yield (x, cy - ring)
+            yield (x, cy + ring)
+        for y in range(cy - ring + 1, cy + ring):
+            yield (cx - ring, y)
+            yield (cx + ring, y)
@@ -0,0 +1,164 @@
+import re
+import unicodedata
+from bisect import bisect_left, insort
+
+# Cyrillic -> Latin transliteration so Russian ads match Latin queries
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'i', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'h', 'ц': 'c', 'ч': 'ch', 'ш': 'sh', 'щ': 'sh', 'ъ': '',
+    'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'ju', 'я': 'ja'
+}
+TRANSLITERATION = str.maketrans(CYRILLIC_TO_LATIN)
+
+# English and Russian variants mapped to one Latvian token
+SYNONYMS = {
+    'center': 'centrs', 'centre': 'centrs', 'centr': 'centrs',
+    'oldtown': 'vecriga', 'staryj': 'vecriga',
+    'street': 'iela', 'st': 'iela', 'ul': 'iela', 'ulica': 'iela',
+}
+
+# Token prefixes that indicate an amenity in address or description text
+AMENITY_TERMS = {
+    'furniture': ('furnished', 'furniture', 'mebel', 'mebelem'),
+    'parking': ('parking', 'parkovk', 'stavviet', 'autostavviet'),
+    'pets': ('pets', 'zhivotn', 'dzivniek'),
+}
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def normalize_text(text):
+    """Lowercase, transliterate Cyrillic and strip Latvian diacritics (ā -> a, š -> s)"""
+    text = text.lower().translate(TRANSLITERATION)
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    """Split text into normalized tokens"""
+    if not text:
+        return []
+    return [SYNONYMS.get(token, token) for token in TOKEN_PATTERN.findall(normalize_text(text))]
+
+
+class InvertedIndex:
+    """Token -> set of document ids, with prefix lookups over a sorted vocabulary"""
+    
+    def __init__(self):
+        """Initialize empty index"""
+        self.postings = {}    # Token -> set of document ids
+        self.doc_tokens = {}  # Document id -> set of its tokens (for removal)
+        self.vocabulary = []  # Sorted list of tokens
+    
+    def add(self, doc_id, text):
+        """Index (or re-index) a document"""
+        if doc_id in self.doc_tokens:
+            self.remove(doc_id)
+        tokens = set(tokenize(text))
+        self.doc_tokens[doc_id] = tokens
+        for token in tokens:
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = set()
+                insort(self.vocabulary, token)
+            posting.add(doc_id)
+    
+    def remove(self, doc_id):
+        """Remove a document from the index"""
+        for token in self.doc_tokens.pop(doc_id, ()):
+            posting = self.postings[token]
+            posting.discard(doc_id)
+            if not posting:
+                del self.postings[token]
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+    
+    def lookup(self, token, prefix=False):
+        """Documents containing token (or any token starting with it)"""
+        if not prefix:
+            return self.postings.get(token, set())
+        result = set()
+        i = bisect_left(self.vocabulary, token)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(token):
+            result |= self.postings[self.vocabulary[i]]
+            i += 1
+        return result
+    
+    def search(self, query, prefix=True):
+        """Documents containing all tokens of query (posting-list intersection)"""
+        tokens = tokenize(query)
+        if not tokens:
+            return set()
+        postings = sorted((self.lookup(token, prefix) for token in tokens), key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            if not result:
+                break
+            result &= posting
+        return result
+    
+    def search_any(self, queries, prefix=True):
+        """Documents matching at least one of the queries"""
+        result = set()
+        for query in queries:
+            result |= self.search(query, prefix)
+        return result
+
+
+class PropertyTextIndex:
+    """Inverted indexes over property addresses and description text
+    
+    Properties can be added, replaced and removed one at a time as listings
+    arrive; queries return properties in the order they were added.
+    """
+    
+    def __init__(self, properties=None):
+        """Initialize index, optionally filled with properties"""
+        self.address_index = InvertedIndex()
+        self.text_index = InvertedIndex()
+        self.properties = {}  # Property id -> property
+        self.sequence = {}    # Property id -> insertion number, for result order
+        self._next_sequence = 0
+        if properties:
+            for prop in properties:
+                self.add(prop)
+    
+    def add(self, prop):
+        """Index (or re-index) a property"""
+        if prop.id not in self.sequence:
+            self.sequence[prop.id] = self._next_sequence
+            self._next_sequence += 1
+        self.properties[prop.id] = prop
+        self.address_index.add(prop.id, prop.address)
+        self.text_index.add(prop.id, " ".join(filter(None, [prop.title, prop.address, prop.description])))
+    
+    def remove(self, property_id):
+        """Remove a property from the index"""
+        if self.properties.pop(property_id, None) is not None:
+            del self.sequence[property_id]
+            self.address_index.remove(property_id)
+            self.text_index.remove(property_id)
+    
+    def _in_order(self, ids):
+        """Properties for a set of ids, in insertion order"""
+        return [self.properties[prop_id] for prop_id in sorted(ids, key=self.sequence.__getitem__)]
+    
+    def filter_by_district(self, district_list):
+        """Properties whose address matches any of the districts"""
+        return self._in_order(self.address_index.search_any(district_list))
+    
+    def filter_by_street(self, street):
+        """Properties whose address contains all words of street"""
+        return self._in_order(self.address_index.search(street))
+    
+    def filter_by_keywords(self, keywords):
+        """Properties whose title, address or description contain all keywords"""
+        return self._in_order(self.text_index.search(keywords))
+    
+    def filter_by_amenity(self, amenity):
+        """Properties whose text mentions an amenity from AMENITY_TERMS"""
+        ids = set()
+        for term in AMENITY_TERMS[amenity]:
+            ids |= self.text_index.lookup(term, prefix=True)
+        return self._in_order(ids)
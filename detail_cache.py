@@ -0,0 +1,64 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class DetailCache:
+    """Persistent SQLite cache of parsed ad detail pages, keyed by ad id"""
+
+    def __init__(self, path='detail_cache.sqlite', freshness=6 * 3600):
+        """Open (or create) the cache file"""
+        self.path = path
+        self.freshness = freshness  # Seconds an entry is used without revalidating
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS details ("
+            " ad_id TEXT PRIMARY KEY,"
+            " url TEXT, etag TEXT, last_modified TEXT,"
+            " details TEXT, fetched REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, ad_id):
+        """Return the cache entry for ad_id as a dict, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, etag, last_modified, details, fetched FROM details WHERE ad_id = ?",
+                (ad_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'ad_id': ad_id,
+            'url': row[0],
+            'etag': row[1],
+            'last_modified': row[2],
+            'details': json.loads(row[3]),
+            'fetched': row[4],
+        }
+
+    def is_fresh(self, entry):
+        """Whether an entry can be used without asking the server"""
+        return time.time() - entry['fetched'] < self.freshness
+
+    def put(self, ad_id, url, details, etag=None, last_modified=None):
+        """Store parsed details together with the response validators"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO details VALUES (?, ?, ?, ?, ?, ?)",
+                (ad_id, url, etag, last_modified, json.dumps(details), time.time())
+            )
+            self._conn.commit()
+
+    def touch(self, ad_id):
+        """Mark an entry as revalidated (server answered 304 Not Modified)"""
+        with self._lock:
+            self._conn.execute("UPDATE details SET fetched = ? WHERE ad_id = ?", (time.time(), ad_id))
+            self._conn.commit()
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
@@ -1,104 +1,428 @@
+import functools
+import heapq
+import math
+
+from data_structures.property_store import PropertyStore, MISSING_INT, _to_flag
+from data_structures.text_index import tokenize
+
+_numpy_module = None
+
+
+def _numpy():
+    """NumPy, imported on first use (it dominates start-up time), or None if not installed"""
+    global _numpy_module
+    if _numpy_module is None:
+        try:
+            import numpy
+            _numpy_module = numpy
+        except ImportError:  # NumPy is optional, queries then run as one pure-Python pass
+            _numpy_module = False
+    return _numpy_module or None
+
+
+def _missing_last(value):
+    """Sort missing values after all real ones"""
+    return math.inf if value is None else value
+
+
+# Named sort keys for PropertyFilter.sort_by / top_k
+SORT_KEYS = {
+    'price': lambda prop: prop.price,
+    'price_per_m2': lambda prop: prop.price / prop.size if prop.size else math.inf,
+    'size': lambda prop: _missing_last(prop.size),
+    'rooms': lambda prop: _missing_last(prop.rooms),
+    'distance': lambda prop: _missing_last(prop.distance_to_center),
+    'time': lambda prop: _missing_last(prop.time_to_center),
+}
+
+
+# Near-duplicate tolerances for PropertyFilter.find_duplicate_groups
+DUPLICATE_SIZE_TOLERANCE = 2      # m2
+DUPLICATE_PRICE_TOLERANCE = 0.1   # Relative to the higher price
+
+
+def _normalized_address(address):
+    """Address tokens joined, e.g. 'Brīvības st. 10' -> 'brivibas iela 10'"""
+    return " ".join(tokenize(address))
+
+
+@functools.lru_cache(maxsize=65536)
+def _address_text(address):
+    """Normalized address tokens, each preceded by a space, computed once per distinct address"""
+    return "".join(" " + token for token in tokenize(address))
+
+
+def _matches_district(address, districts):
+    """Whether all tokens of some district prefix-match address tokens, as in text_index searches
+
+    districts holds the tokens of each district with a leading space, so
+    a token prefix match is a substring test on _address_text.
+    """
+    if not address:
+        return False
+    text = _address_text(address)
+    for district in districts:
+        for part in district:
+            if part not in text:
+                break
+        else:
+            return True
+    return False
+
+
+def _prices_close(a, b, tolerance):
+    """Whether two prices differ by at most tolerance (relative)"""
+    if a is None or b is None:
+        return a == b
+    return abs(a - b) <= tolerance * max(abs(a), abs(b))
+
+
+class _Descending:
+    """Wrapper that reverses the ordering of a non-numeric sort key"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def _composite_key(keys):
+    """Build one tuple key function from (key, descending) specifications"""
+    getters = []
+    for spec in keys:
+        key, descending = spec if isinstance(spec, tuple) else (spec, False)
+        getters.append((SORT_KEYS[key] if isinstance(key, str) else key, descending))
+
+    if len(getters) == 1 and not getters[0][1]:
+        return getters[0][0]
+
+    def composite(prop):
+        parts = []
+        for getter, descending in getters:
+            value = getter(prop)
+            if descending:
+                if isinstance(value, (int, float)):
+                    # Missing values (math.inf) stay last: the flag is not reversed
+                    parts.append(value == math.inf)
+                    value = -value
+                else:
+                    value = _Descending(value)
+            parts.append(value)
+        return tuple(parts)
+
+    return composite
+
+
+class QueryView:
+    """Lazy sequence of the properties selected by a query"""
+
+    def __init__(self, source, indices):
+        self.source = source
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, i):
+        return self.source[int(self.indices[i])]
+
+    def __iter__(self):
+        for i in self.indices:
+            yield self.source[int(i)]
+
+
+class PropertyQuery:
+    """Compound property query that evaluates all predicates together
+
+    The source is either a list of properties or a PropertyStore. Over a
+    store the predicates are combined as NumPy boolean masks over the
+    columns; over a list (or without NumPy) every property is checked
+    against all predicates in a single pass.
+    """
+
+    def __init__(self, source):
+        """Start an empty query (matches everything) over source"""
+        self.source = source
+        self.predicates = []  # (field, operator, argument)
+
+    def price_range(self, min_price=0, max_price=float('inf')):
+        self.predicates.append(('price', 'between', (min_price, max_price)))
+        return self
+
+    def utilities_included(self, included=True):
+        self.predicates.append(('utilities_included', 'eq', included))
+        return self
+
+    def district(self, district_list):
+        districts = (tuple(" " + token for token in tokenize(district)) for district in district_list)
+        self.predicates.append(('address', 'district_any', tuple(district for district in districts if district)))
+        return self
+
+    def max_distance(self, max_distance):
+        self.predicates.append(('distance_to_center', 'max_nonzero', max_distance))
+        return self
+
+    def rooms(self, min_rooms, max_rooms=float('inf')):
+        self.predicates.append(('rooms', 'between', (min_rooms, max_rooms)))
+        return self
+
+    def furniture(self, has_furniture=True):
+        self.predicates.append(('has_furniture', 'eq', has_furniture))
+        return self
+
+    def pets_allowed(self, allowed=True):
+        self.predicates.append(('pets_allowed', 'eq', allowed))
+        return self
+
+    def parking(self, available=True):
+        self.predicates.append(('has_parking', 'eq', available))
+        return self
+
+    def publish_date(self, target_date):
+        self.predicates.append(('published_date', 'eq', target_date))
+        return self
+
+    def indices(self):
+        """Return positions of the matching properties in the source"""
+        if isinstance(self.source, PropertyStore):
+            np = _numpy()
+            if np is not None:
+                return np.flatnonzero(self._store_mask(np))
+            return self._store_indices()
+        return [i for i, prop in enumerate(self.source) if self._matches(prop)]
+
+    def view(self):
+        """Return the matches as a lazy QueryView"""
+        return QueryView(self.source, self.indices())
+
+    def results(self):
+        """Return the matching properties as a list"""
+        if isinstance(self.source, PropertyStore):
+            return list(self.view())
+        return [prop for prop in self.source if self._matches(prop)]
+
+    def count(self):
+        """Return the number of matching properties"""
+        return len(self.indices())
+
+    def _matches(self, prop):
+        """Check one Property object against all predicates"""
+        for field, operator, argument in self.predicates:
+            value = getattr(prop, field)
+            if operator == 'between':
+                if not argument[0] <= value <= argument[1]:
+                    return False
+            elif operator == 'eq':
+                if value != argument:
+                    return False
+            elif operator == 'max_nonzero':
+                if not (value and value <= argument):
+                    return False
+            elif operator == 'district_any':
+                if not _matches_district(value, argument):
+                    return False
+        return True
+
+    def _store_mask(self, np):
+        """Boolean mask over all store rows, one vectorized step per predicate"""
+        columns = self.source.columns
+        n = len(self.source)
+        mask = np.ones(n, dtype=bool)
+        if n == 0:
+            return mask
+
+        for field, operator, argument in self.predicates:
+            column = columns[field]
+            values = np.frombuffer(column, dtype=column.typecode)
+            if field in PropertyStore.CATEGORY_COLUMNS:
+                # Test each distinct value once, then gather by code
+                lookup = np.array(self._category_lookup(field, operator, argument), dtype=bool)
+                mask &= lookup[values]
+            elif operator == 'between':
+                mask &= (values >= argument[0]) & (values <= argument[1])
+                if field in PropertyStore.INT_COLUMNS:
+                    mask &= values != MISSING_INT
+            elif operator == 'eq':
+                mask &= values == _to_flag(argument)
+            elif operator == 'max_nonzero':
+                mask &= (values != 0) & (values <= argument)  # NaN compares False
+        return mask
+
+    def _category_lookup(self, field, operator, argument):
+        """Evaluate a predicate once per distinct value of a category column"""
+        lookup = []
+        for value in self.source.categories[field]:
+            if operator == 'eq':
+                lookup.append(value == argument)
+            else:
+                lookup.append(_matches_district(value, argument))
+        return lookup
+
+    def _store_indices(self):
+        """Row-by-row store evaluation used when NumPy is not installed"""
+        columns = self.source.columns
+        lookups = {field: self._category_lookup(field, operator, argument)
+                   for field, operator, argument in self.predicates
+                   if field in PropertyStore.CATEGORY_COLUMNS}
+        result = []
+        for row in range(len(self.source)):
+            for field, operator, argument in self.predicates:
+                value = columns[field][row]
+                if field in lookups:
+                    if not lookups[field][value]:
+                        break
+                elif operator == 'between':
+                    if value == MISSING_INT or not argument[0] <= value <= argument[1]:
+                        break
+                elif operator == 'eq':
+                    if value != _to_flag(argument):
+                        break
+                elif operator == 'max_nonzero':
+                    if not (value and value <= argument):
+                        break
+            else:
+                result.append(row)
+        return result
+
+
 class PropertyFilter:
     """Class for working with property filtering"""
 
     @staticmethod
     def filter_by_price_range(properties, min_price=0, max_price=float('inf')):
         """Filter properties by price range"""
-        return [prop for prop in properties if min_price <= prop.price <= max_price]
+        return PropertyQuery(properties).price_range(min_price, max_price).results()
 
     @staticmethod
     def filter_by_utilities_included(properties, included=True):
         """Filter properties by whether utilities are included"""
-        return [prop for prop in properties if prop.utilities_included == included]
+        return PropertyQuery(properties).utilities_included(included).results()
 
     @staticmethod
     def filter_by_district(properties, district_list):
-        """Filter properties by city district"""
-        result = []
-        for prop in properties:
-            for district in district_list:
-                if district.lower() in prop.address.lower():
-                    result.append(prop)
-                    break
-        return result
+        """Filter properties by city district (address token prefix match, as in text_index)"""
+        return PropertyQuery(properties).district(district_list).results()
 
     @staticmethod
     def filter_by_distance(properties, max_distance):
         """Filter properties by distance to center"""
-        return [prop for prop in properties if prop.distance_to_center and prop.distance_to_center <= max_distance]
+        return PropertyQuery(properties).max_distance(max_distance).results()
 
     @staticmethod
     def filter_by_rooms(properties, min_rooms, max_rooms=float('inf')):
         """Filter properties by number of rooms"""
-        return [prop for prop in properties if min_rooms <= prop.rooms <= max_rooms]
+        return PropertyQuery(properties).rooms(min_rooms, max_rooms).results()
 
     @staticmethod
     def filter_by_furniture(properties, has_furniture=True):
         """Filter properties by furniture"""
-        return [prop for prop in properties if prop.has_furniture == has_furniture]
+        return PropertyQuery(properties).furniture(has_furniture).results()
 
     @staticmethod
     def filter_by_pets_allowed(properties, allowed=True):
         """Filter properties by pet allowance"""
-        return [prop for prop in properties if prop.pets_allowed == allowed]
+        return PropertyQuery(properties).pets_allowed(allowed).results()
 
     @staticmethod
     def filter_by_parking(properties, available=True):
         """Filter properties by parking availability"""
-        return [prop for prop in properties if prop.has_parking == available]
+        return PropertyQuery(properties).parking(available).results()
 
     @staticmethod
     def filter_by_publish_date(properties, target_date):
         """Filter properties by published date (ISO format string)"""
-        return [prop for prop in properties if prop.published_date == target_date]
+        return PropertyQuery(properties).publish_date(target_date).results()
+
+    @staticmethod
+    def query(properties):
+        """Start a compound PropertyQuery over a list or PropertyStore"""
+        return PropertyQuery(properties)
 
     @staticmethod
     def sort_by_price_ascending(properties):
-        """Sort properties by price in ascending order using QuickSort"""
+        """Sort properties by price in ascending order (stable, O(n log n))"""
+        return PropertyFilter.sort_by(properties, 'price')
+
+    @staticmethod
+    def sort_by(properties, *keys):
+        """Stable multi-key sort
+
+        Each key is a name from SORT_KEYS, a function of a property, or a
+        (key, descending) tuple, e.g. sort_by(props, 'price', 'price_per_m2',
+        ('distance', True)).
+        """
         if not properties:
             return []
-
-        return PropertyFilter._quick_sort(properties.copy(), 0, len(properties) - 1)
+        return sorted(properties, key=_composite_key(keys or ('price',)))
 
     @staticmethod
-    def _quick_sort(arr, low, high):
-        """QuickSort algorithm implementation"""
-        if low < high:
-            pivot_index = PropertyFilter._partition(arr, low, high)
-            PropertyFilter._quick_sort(arr, low, pivot_index - 1)
-            PropertyFilter._quick_sort(arr, pivot_index + 1, high)
-        return arr
+    def top_k(properties, k, *keys):
+        """First k properties of sort_by(properties, *keys) without a full sort"""
+        if not properties or k <= 0:
+            return []
+        key = _composite_key(keys or ('price',))
+        if k >= len(properties):
+            return sorted(properties, key=key)
+        # heapq.nsmallest keeps equal keys in input order, so this stays stable
+        return heapq.nsmallest(k, properties, key=key)
 
     @staticmethod
-    def _partition(arr, low, high):
-        """Partition array around pivot element"""
-        pivot = arr[high].price
-        i = low - 1
-        for j in range(low, high):
-            if arr[j].price <= pivot:
-                i += 1
-                arr[i], arr[j] = arr[j], arr[i]
-        arr[i + 1], arr[high] = arr[high], arr[i + 1]
-        return i + 1
+    def find_duplicate_groups(properties, size_tolerance=DUPLICATE_SIZE_TOLERANCE,
+                              price_tolerance=DUPLICATE_PRICE_TOLERANCE):
+        """Group near-duplicate listings
+
+        Listings are blocked by normalized address and rooms, so only
+        listings in the same block are compared. Inside a block they are
+        swept in size order and joined to the first group whose first
+        member is within size_tolerance m2 and price_tolerance (relative)
+        in price. Each group lists the cheapest property first, then the
+        rest in input order; groups are in order of first appearance.
+        """
+        # Blocking key: normalized address + rooms; only listings sharing it are compared
+        addresses = {}  # Raw address -> normalized, many listings share a street
+        blocks = {}
+        for position, prop in enumerate(properties):
+            address = addresses.get(prop.address)
+            if address is None:
+                address = addresses[prop.address] = _normalized_address(prop.address)
+            blocks.setdefault((address, prop.rooms), []).append((position, prop))
+
+        groups = []
+        for block in blocks.values():
+            if len(block) == 1:
+                groups.append(block)
+                continue
+            block.sort(key=lambda entry: (entry[1].size or 0, entry[0]))
+            open_groups = []  # Groups whose first member is still within size tolerance
+            for entry in block:
+                size = entry[1].size or 0
+                open_groups = [group for group in open_groups
+                               if size - (group[0][1].size or 0) <= size_tolerance]
+                for group in open_groups:
+                    if _prices_close(group[0][1].price, entry[1].price, price_tolerance):
+                        group.append(entry)
+                        break
+                else:
+                    group = [entry]
+                    open_groups.append(group)
+                    groups.append(group)
+
+        result = []
+        for group in sorted(groups, key=lambda group: min(position for position, _ in group)):
+            group.sort(key=lambda entry: entry[0])
+            cheapest = min(group, key=lambda entry: entry[1].price)[1]
+            result.append([cheapest] + [prop for _, prop in group if prop is not cheapest])
+        return result
 
     @staticmethod
     def remove_duplicates(properties):
-        """Remove duplicate properties, keeping the cheapest one"""
+        """Remove near-duplicate properties, keeping the cheapest one of each group"""
         if not properties:
             return []
-
-        unique_properties = {}
-
-        for prop in properties:
-            prop_hash = hash(prop)
-            if prop_hash in unique_properties:
-                if prop.price < unique_properties[prop_hash].price:
-                    unique_properties[prop_hash] = prop
-                elif prop.price == unique_properties[prop_hash].price:
-                    existing_prop = unique_properties[prop_hash]
-                    existing_prop.portal += f", {prop.portal}"
-                    existing_prop.source_url += f", {prop.source_url}"
-            else:
-                unique_properties[prop_hash] = prop
-
-        return list(unique_properties.values())
\ No newline at end of file
+        return [group[0] for group in PropertyFilter.find_duplicate_groups(properties)]
@@ -0,0 +1,98 @@
+import sqlite3
+import threading
+import time
+
+
+class GeocodeCache:
+    """Persistent SQLite cache for geocoded addresses and their distance to center"""
+
+    def __init__(self, path='geocode_cache.sqlite', ttl=30 * 24 * 3600, max_entries=10000, touch_interval=3600):
+        """Open (or create) the cache file"""
+        self.path = path
+        self.ttl = ttl                  # Seconds before an entry expires
+        self.max_entries = max_entries  # Least recently used entries are evicted above this
+        self.touch_interval = touch_interval  # A hit rewrites last_used only when it is older than this
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            " address TEXT PRIMARY KEY,"
+            " lat REAL, lon REAL,"
+            " distance REAL, time_minutes INTEGER,"
+            " created REAL, last_used REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS geocode_last_used ON geocode (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def normalize(address):
+        """Normalize address so that spelling variants share one entry"""
+        return " ".join(address.lower().replace(",", " ").split())
+
+    def get(self, address):
+        """Return cached (lat, lon, distance, time_minutes) or None"""
+        key = self.normalize(address)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lat, lon, distance, time_minutes, created, last_used FROM geocode WHERE address = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if now - row[4] > self.ttl:
+                self._conn.execute("DELETE FROM geocode WHERE address = ?", (key,))
+                self._conn.commit()
+                self.expired += 1
+                self.misses += 1
+                return None
+            # Eviction order only needs touch_interval precision, so most hits do not write
+            if now - row[5] > self.touch_interval:
+                self._conn.execute("UPDATE geocode SET last_used = ? WHERE address = ?", (now, key))
+                self._conn.commit()
+            self.hits += 1
+            return row[0], row[1], row[2], row[3]
+
+    def put(self, address, lat, lon, distance, time_minutes):
+        """Store a geocoding result, evicting old entries above max_entries"""
+        key = self.normalize(address)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, lat, lon, distance, time_minutes, now, now)
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+            if count > self.max_entries:
+                excess = count - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM geocode WHERE address IN"
+                    " (SELECT address FROM geocode ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+                self.evictions += excess
+            self._conn.commit()
+
+    def stats(self):
+        """Return cache statistics"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,93 @@
+import contextlib
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Default (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (5, 20)
+
+
+class HttpClient:
+    """Shared HTTP client with keep-alive pooling, retries and timeouts"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=3, backoff_factor=0.5,
+                 pool_size=10, headers=None):
+        """Create a pooled session that retries 429 and 5xx responses"""
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+        if headers:
+            self.session.headers.update(headers)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,  # Exponential: 0.5s, 1s, 2s, ...
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=('GET', 'HEAD'),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url, **kwargs):
+        """GET request with the client's default timeout"""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide shared HttpClient"""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient()
+        return _shared_client
+
+
+class RequestBudget:
+    """Politeness limits shared by every thread that requests one site
+
+    At most max_concurrent requests run at a time, and request starts are
+    spaced about 1 / rate seconds apart (randomly spread by +-spread, so
+    requests do not fall on a fixed beat), however many threads or scrape
+    targets draw from the budget.
+    """
+
+    def __init__(self, rate=3.0, max_concurrent=4, spread=0.25):
+        """Initialize budget (rate in requests per second)"""
+        self.interval = 1.0 / rate
+        self.spread = spread
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.lock = threading.Lock()
+        self.next_start = 0.0  # time.monotonic() before which no request may start
+        self.requests = 0
+
+    def _wait_turn(self):
+        """Block until this thread may start a request"""
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval * (1 + random.uniform(-self.spread, self.spread))
+            self.requests += 1
+        if start > now:
+            time.sleep(start - now)
+
+    @contextlib.contextmanager
+    def slot(self):
+        """Context for one request made within the budget"""
+        with self.slots:
+            self._wait_turn()
+            yield
@@ -0,0 +1,69 @@
+import hashlib
+import json
+from collections import namedtuple
+
+ADDED = 'added'
+REMOVED = 'removed'
+PRICE_CHANGED = 'price_changed'
+DETAILS_CHANGED = 'details_changed'
+
+# old/new are Property objects (old is None for added, new is None for removed);
+# for listings only known from a snapshot, old is the stored (price, fingerprint)
+ListingChange = namedtuple('ListingChange', ['kind', 'id', 'old', 'new'])
+
+# Fields that describe the flat itself; price is compared separately and
+# fields recomputed on every run (published_date, distances) are left out
+FINGERPRINT_FIELDS = (
+    'title', 'address', 'size', 'rooms', 'floor', 'has_furniture', 'kitchen_equipment',
+    'bathroom', 'utilities_included', 'has_parking', 'pets_allowed', 'min_rent_term',
+    'description'
+)
+
+
+def fingerprint(prop):
+    """Content hash of a listing's details (excluding price)"""
+    data = [getattr(prop, name) for name in FINGERPRINT_FIELDS]
+    return hashlib.sha1(json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+
+def diff_listings(snapshot, current, complete=True):
+    """Compare a scrape against the stored snapshot
+
+    snapshot maps id -> (price, fingerprint), as returned by
+    ListingStore.snapshot(); current is a list of properties. Listings
+    missing from current are only reported as removed when the scrape
+    was complete (covered the whole feed). Returns a list of
+    ListingChange events, unchanged listings produce none.
+    """
+    current_by_id = {prop.id: prop for prop in current}
+    current_ids = set(current_by_id)
+    previous_ids = set(snapshot)
+
+    changes = []
+    for prop_id in sorted(current_ids - previous_ids):
+        changes.append(ListingChange(ADDED, prop_id, None, current_by_id[prop_id]))
+
+    for prop_id in sorted(current_ids & previous_ids):
+        prop = current_by_id[prop_id]
+        old_price, old_fingerprint = snapshot[prop_id]
+        if prop.price != old_price:
+            changes.append(ListingChange(PRICE_CHANGED, prop_id, snapshot[prop_id], prop))
+        if fingerprint(prop) != old_fingerprint:
+            changes.append(ListingChange(DETAILS_CHANGED, prop_id, snapshot[prop_id], prop))
+
+    if complete:
+        for prop_id in sorted(previous_ids - current_ids):
+            changes.append(ListingChange(REMOVED, prop_id, snapshot[prop_id], None))
+
+    return changes
+
+
+def changed_properties(changes):
+    """Properties that need storing/re-indexing for a list of changes (no duplicates)"""
+    seen = set()
+    result = []
+    for change in changes:
+        if change.new is not None and change.id not in seen:
+            seen.add(change.id)
+            result.append(change.new)
+    return result
@@ -0,0 +1,191 @@
+import datetime
+import json
+import sqlite3
+import threading
+from urllib.parse import urlparse
+from property import Property
+from listing_diff import REMOVED, changed_properties, fingerprint
+
+
+def district_from_url(url):
+    """District slug from an ad URL, e.g. 'teika' from .../flats/riga/teika/abc.html"""
+    if not url:
+        return None
+    parts = urlparse(url.split(',')[0].strip()).path.strip('/').split('/')
+    return parts[-2] if len(parts) >= 2 else None
+
+
+class ListingStore:
+    """Persistent SQLite store of full property records with price history
+
+    Listings are upserted incrementally and indexed by id, price and
+    district. Queries read rows lazily, so a query-only run can work from
+    the stored data without any network access.
+    """
+
+    def __init__(self, path='listings.sqlite'):
+        """Open (or create) the store"""
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            # Write-ahead log: readers are not blocked while a refresh writes
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS listings ("
+            " id TEXT PRIMARY KEY,"
+            " price REAL, district TEXT,"
+            " first_seen TEXT, last_seen TEXT,"
+            " active INTEGER DEFAULT 1,"
+            " fingerprint TEXT,"
+            " data TEXT);"
+            "CREATE INDEX IF NOT EXISTS listings_price ON listings (price);"
+            "CREATE INDEX IF NOT EXISTS listings_district ON listings (district);"
+            "CREATE TABLE IF NOT EXISTS price_history ("
+            " id TEXT, price REAL, seen TEXT);"
+            "CREATE INDEX IF NOT EXISTS price_history_id ON price_history (id);"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(listings)")}
+        if 'fingerprint' not in columns:
+            # Stores created before change detection existed
+            self._conn.execute("ALTER TABLE listings ADD COLUMN fingerprint TEXT")
+        self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM listings WHERE active = 1").fetchone()[0]
+
+    def upsert(self, properties, seen=None):
+        """Insert new listings and update known ones in one transaction
+
+        A price_history row is written for new listings and whenever the
+        price changes. Returns the ids that were not stored before.
+        """
+        seen = (seen or datetime.datetime.now()).isoformat()
+        new_ids = []
+        with self._lock:
+            known = self._known_prices([prop.id for prop in properties])
+            for prop in properties:
+                data = json.dumps(prop.to_dict(), ensure_ascii=False)
+                district = district_from_url(prop.source_url)
+                content_hash = fingerprint(prop)
+                if prop.id not in known:
+                    self._conn.execute(
+                        "INSERT INTO listings (id, price, district, first_seen, last_seen, active, fingerprint, data)"
+                        " VALUES (?, ?, ?, ?, ?, 1, ?, ?)",
+                        (prop.id, prop.price, district, seen, seen, content_hash, data)
+                    )
+                    self._conn.execute("INSERT INTO price_history VALUES (?, ?, ?)", (prop.id, prop.price, seen))
+                    new_ids.append(prop.id)
+                    known[prop.id] = prop.price
+                    continue
+
+                self._conn.execute(
+                    "UPDATE listings SET price = ?, district = ?, last_seen = ?, active = 1,"
+                    " fingerprint = ?, data = ? WHERE id = ?",
+                    (prop.price, district, seen, content_hash, data, prop.id)
+                )
+                if known[prop.id] != prop.price:
+                    self._conn.execute("INSERT INTO price_history VALUES (?, ?, ?)", (prop.id, prop.price, seen))
+                    known[prop.id] = prop.price
+            self._conn.commit()
+        return new_ids
+
+    def _known_prices(self, ids):
+        """Current stored price for each of ids that is already stored"""
+        known = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT id, price FROM listings WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            )
+            known.update(rows)
+        return known
+
+    def snapshot(self):
+        """Map of id -> (price, fingerprint) for all active listings"""
+        with self._lock:
+            rows = self._conn.execute("SELECT id, price, fingerprint FROM listings WHERE active = 1")
+            return {prop_id: (price, content_hash) for prop_id, price, content_hash in rows}
+
+    def touch(self, ids, seen=None):
+        """Update last_seen of unchanged listings"""
+        seen = (seen or datetime.datetime.now()).isoformat()
+        with self._lock:
+            self._conn.executemany("UPDATE listings SET last_seen = ? WHERE id = ?", [(seen, i) for i in ids])
+            self._conn.commit()
+
+    def apply_changes(self, changes, unchanged_ids=(), seen=None):
+        """Write the result of diff_listings: upsert added/changed, deactivate removed"""
+        seen = seen or datetime.datetime.now()
+        self.upsert(changed_properties(changes), seen)
+        self.deactivate([change.id for change in changes if change.kind == REMOVED])
+        if unchanged_ids:
+            self.touch(unchanged_ids, seen)
+
+    def deactivate(self, ids):
+        """Mark listings as withdrawn (kept with their history)"""
+        with self._lock:
+            self._conn.executemany("UPDATE listings SET active = 0 WHERE id = ?", [(i,) for i in ids])
+            self._conn.commit()
+
+    def _iter_rows(self, where="active = 1", params=(), order="price", batch_size=256):
+        """Yield Property objects for matching rows, reading batch_size rows at a time
+
+        The lock is held only while a batch is fetched, so the caller may
+        use the store between rows.
+        """
+        with self._lock:
+            cursor = self._conn.execute(f"SELECT data FROM listings WHERE {where} ORDER BY {order}", params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for (data,) in rows:
+                yield Property.from_dict(json.loads(data))
+
+    def iter_properties(self, include_inactive=False):
+        """Lazily yield stored properties, cheapest first"""
+        return self._iter_rows("1 = 1" if include_inactive else "active = 1")
+
+    def load(self, include_inactive=False):
+        """Return all stored properties as a list, cheapest first"""
+        return list(self.iter_properties(include_inactive))
+
+    def get(self, property_id):
+        """Return the stored property with the given id, or None"""
+        return next(self._iter_rows("id = ?", (property_id,)), None)
+
+    def find_by_price(self, min_price, max_price):
+        """Active properties in a price range (uses the price index)"""
+        return list(self._iter_rows("active = 1 AND price BETWEEN ? AND ?", (min_price, max_price)))
+
+    def find_by_district(self, district):
+        """Active properties in an ss.com district, e.g. 'teika' (uses the district index)"""
+        return list(self._iter_rows("active = 1 AND district = ?", (district.lower(),)))
+
+    def ids(self, include_inactive=False):
+        """Set of stored listing ids"""
+        where = "" if include_inactive else " WHERE active = 1"
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT id FROM listings" + where)}
+
+    def first_seen(self, property_id):
+        """When a listing was first stored, as a datetime (or None)"""
+        with self._lock:
+            row = self._conn.execute("SELECT first_seen FROM listings WHERE id = ?", (property_id,)).fetchone()
+        return datetime.datetime.fromisoformat(row[0]) if row else None
+
+    def price_history(self, property_id):
+        """List of (datetime, price) for a listing, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seen, price FROM price_history WHERE id = ? ORDER BY seen", (property_id,)
+            ).fetchall()
+        return [(datetime.datetime.fromisoformat(seen), price) for seen, price in rows]
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
@@ -1,148 +1,219 @@
 import sys
+import contextlib
 import datetime
-import pickle
-import os
-from property import Property
-from data_structures.binary_search_tree import BinarySearchTree
-from data_structures.heap import MinHeap
-from scraper import PropertyScraper
 from filtering import PropertyFilter
-from utils import calculate_distance_to_center, measure_time_complexity
-
-class PriorityQueue:
-    def __init__(self, comparator=None):
-        self.heap = []
-        self.size = 0
-        self.comparator = comparator or (lambda x, y: x < y)
-
-    def is_empty(self):
-        return self.size == 0
-
-    def peek(self):
-        if self.size <= 0:
-            return None
-        return self.heap[0]
-
-    def insert(self, item):
-        self.heap.append(item)
-        self.size += 1
-        self._sift_up(self.size - 1)
-
-    def extract(self):
-        if self.size <= 0:
-            return None
-        top = self.heap[0]
-        self.heap[0] = self.heap[self.size - 1]
-        self.size -= 1
-        self.heap.pop()
-        if self.size > 0:
-            self._sift_down(0)
-        return top
-
-    def _sift_up(self, index):
-        parent = (index - 1) // 2
-        if index > 0 and self.comparator(self.heap[index], self.heap[parent]):
-            self.heap[index], self.heap[parent] = self.heap[parent], self.heap[index]
-            self._sift_up(parent)
-
-    def _sift_down(self, index):
-        smallest = index
-        left = 2 * index + 1
-        right = 2 * index + 2
-        if left < self.size and self.comparator(self.heap[left], self.heap[smallest]):
-            smallest = left
-        if right < self.size and self.comparator(self.heap[right], self.heap[smallest]):
-            smallest = right
-        if smallest != index:
-            self.heap[index], self.heap[smallest] = self.heap[smallest], self.heap[index]
-            self._sift_down(smallest)
-
-def main():
-    print("Apartment Rental Finder - Riga (SS.com only)")
-    print("====================================================================================================================")
-
-    scraper = PropertyScraper()
-    print("Getting rental data from SS.com...")
-    ss_properties_rent = scraper.scrape_ss_com(max_price=1500) or []
+from property_indexes import PropertyIndexes
+from batch import build_arg_parser, run_query, write_results
+from snapshot import SNAPSHOT_PATH, load_snapshot, save_snapshot
+
+# Scraping, geocoding and storage modules (requests, bs4, sqlite3) are imported
+# where they are used, so query-only runs served from the snapshot skip them
+
+LISTINGS_PATH = 'listings.sqlite'
+
+
+def collect_properties(listing_store, targets, stop_after_known=5, max_pages=None):
+    """Scrape new listings of the target sections, geocode and deduplicate them, then store them
+
+    Listing pages are read until stop_after_known consecutive stored ads,
+    so a refresh only downloads the new head of each section. Returns the
+    new unique properties.
+    """
+    from scraper import PropertyScraper
+    from utils import geocode_properties
+    from geocache import GeocodeCache
+    from detail_cache import DetailCache
+    from listing_diff import diff_listings, ADDED, PRICE_CHANGED, DETAILS_CHANGED
+
+    known_ids = listing_store.ids()
+    detail_cache = DetailCache()
+    scraper = PropertyScraper(detail_cache=detail_cache)
+    print(f"Getting rental data from SS.com ({', '.join(targets)})...")
+    ss_properties_rent = scraper.scrape_targets(targets, max_price=1500, workers=4, known_ids=known_ids,
+                                                stop_after_known=stop_after_known, max_pages=max_pages)
+    detail_cache.close()
+    for target in scraper.failed_targets:
+        print(f"Could not read listings of {target.label}")
 
     all_rent_properties = ss_properties_rent
 
     if not all_rent_properties:
+        if known_ids:
+            print("No new rental properties found.")
+            return []
         print("No rental properties found. Please check your internet connection or try again later.")
         sys.exit(1)
     else:
-        print(f"Found {len(all_rent_properties)} rental properties.")
+        print(f"Found {len(all_rent_properties)} new rental properties.")
 
     print("Calculating distances to center...")
-    for prop in all_rent_properties:
-        distance, time_min = calculate_distance_to_center(prop.address)
-        prop.distance_to_center = distance
-        prop.time_to_center = time_min
+    geocode_cache = GeocodeCache()
+    geocode_stats = geocode_properties(all_rent_properties, cache=geocode_cache)
+    print(f"Geocoded {geocode_stats['addresses']} distinct addresses "
+          f"with {geocode_stats['requests']} geocoding requests")
+    cache_stats = geocode_cache.stats()
+    print(f"Geocoding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+          f"{cache_stats['entries']} entries stored")
+    geocode_cache.close()
 
     print("Removing duplicates...")
-    unique_rent_properties = PropertyFilter.remove_duplicates(all_rent_properties)
-
-    previous_properties = {}
-    if os.path.exists('previous_rent_results.pkl'):
-        try:
-            with open('previous_rent_results.pkl', 'rb') as f:
-                previous_properties = pickle.load(f)
-        except Exception as e:
-            print(f"Error reading previous results: {e}")
-
-    new_properties = []
-    for prop in unique_rent_properties:
-        if prop.id not in previous_properties:
-            new_properties.append(prop)
-            previous_properties[prop.id] = datetime.datetime.now()
-
+    duplicate_groups = PropertyFilter.find_duplicate_groups(all_rent_properties)
+    unique_rent_properties = [group[0] for group in duplicate_groups]
+    merged = len(all_rent_properties) - len(unique_rent_properties)
+    if merged:
+        print(f"Merged {merged} duplicate listings into {sum(1 for g in duplicate_groups if len(g) > 1)} groups")
+
+    # The walk stops at the first run of known ads, so absent ads are not reported as removed
+    changes = diff_listings(listing_store.snapshot(), unique_rent_properties, complete=False)
+    changed_ids = {change.id for change in changes}
     try:
-        with open('previous_rent_results.pkl', 'wb') as f:
-            pickle.dump({prop.id: previous_properties.get(prop.id, datetime.datetime.now())
-                         for prop in unique_rent_properties}, f)
+        listing_store.apply_changes(
+            changes, unchanged_ids=[prop.id for prop in unique_rent_properties if prop.id not in changed_ids]
+        )
     except Exception as e:
         print(f"Error saving results: {e}")
 
-    print("Sorting properties by price...")
-    print("\nMeasuring QuickSort performance:")
-    sorted_rent_properties, quicksort_time = measure_time_complexity(
-        PropertyFilter.sort_by_price_ascending, unique_rent_properties
-    )
-
-    print("\nBuilding Binary Search Tree for price-based searches:")
-    rent_bst = BinarySearchTree()
-    bst_build_time_start = datetime.datetime.now()
-    for prop in sorted_rent_properties:
-        rent_bst.insert(prop.price, prop)
-    bst_build_time = (datetime.datetime.now() - bst_build_time_start).total_seconds()
-    print(f"BST build time: {bst_build_time:.6f} seconds for {len(sorted_rent_properties)} properties")
-    print(f"BST size: {rent_bst.size} nodes")
-
-    print("\nBuilding Min-Heap for efficient minimum price lookups:")
-    rent_min_heap = MinHeap()
-    heap_build_time_start = datetime.datetime.now()
-    for prop in sorted_rent_properties:
-        rent_min_heap.insert(prop)
-    heap_build_time = (datetime.datetime.now() - heap_build_time_start).total_seconds()
-    print(f"Min-Heap build time: {heap_build_time:.6f} seconds")
-    print(f"Min-Heap size: {rent_min_heap.size} elements")
-
-    print("\nBuilding Priority Queue with custom comparator:")
-    def custom_comparator(prop1, prop2):
-        if prop1.utilities_included and not prop2.utilities_included:
-            return True
-        elif not prop1.utilities_included and prop2.utilities_included:
-            return False
+    for change in changes:
+        if change.kind == PRICE_CHANGED:
+            print(f"Price changed: {change.new.title} {change.old[0]:.2f} -> {change.new.price:.2f} EUR")
+    details_changed = sum(1 for change in changes if change.kind == DETAILS_CHANGED)
+    if details_changed:
+        print(f"{details_changed} listings have updated details.")
+
+    return [change.new for change in changes if change.kind == ADDED]
+
+
+def load_properties(offline, targets, stop_after_known=5, max_pages=None):
+    """Stored listings, refreshed by a scrape unless offline; returns (properties, new properties)
+
+    Offline runs read the snapshot written after the last scrape and only
+    open the listing store when the snapshot is missing or stale.
+    """
+    if offline:
+        properties = load_snapshot(source_path=LISTINGS_PATH)
+        if properties:
+            print(f"Loaded {len(properties)} stored rental properties.")
+            return properties, []
+
+    from listing_store import ListingStore
+    listing_store = ListingStore(LISTINGS_PATH)
+    try:
+        if offline:
+            # Query mode: work from stored listings only, no network access
+            properties, new_properties = listing_store.load(), []
+            if not properties:
+                print("No stored rental properties found. Run without --offline first.")
+                sys.exit(1)
+            print(f"Loaded {len(properties)} stored rental properties.")
+            stored = properties
         else:
-            return prop1.price < prop2.price
+            new_properties = collect_properties(listing_store, targets, stop_after_known, max_pages)
+            properties = stored = listing_store.load()
+    finally:
+        listing_store.close()
+    # Written after closing, so the store's final checkpoint does not make it look stale
+    save_snapshot(stored)
+    return properties, new_properties
+
+
+def run_batch(args):
+    """Non-interactive run: one query from the arguments, results as JSON Lines or CSV"""
+    # Progress messages go to stderr so stdout carries only the results
+    with contextlib.redirect_stdout(sys.stderr):
+        properties, new_properties = load_properties(args.offline, args.regions, args.stop_after_known, args.max_pages)
+    indexes = PropertyIndexes(properties)
+    new_ids = {prop.id for prop in new_properties} if args.new_only else None
+    results = run_query(indexes, args, new_ids)
+    write_results(results, args.format, args.output)
+    built = ", ".join(f"{name} {seconds:.6f}s" for name, seconds in indexes.build_times.items())
+    print(f"{len(results)} results written (indexes built: {built or 'none'})", file=sys.stderr)
+
+
+def run_watch(args):
+    """Long-running mode: poll for new and re-priced listings until interrupted"""
+    from scraper import PropertyScraper
+    from geocache import GeocodeCache
+    from detail_cache import DetailCache
+    from listing_store import ListingStore
+    from watch import ListingWatcher
+
+    properties, _ = load_properties(args.offline, args.regions, args.stop_after_known, args.max_pages)
+    indexes = PropertyIndexes(properties)
+    listing_store = ListingStore(LISTINGS_PATH)
+    detail_cache = DetailCache()
+    geocode_cache = GeocodeCache()
+    watcher = ListingWatcher(PropertyScraper(detail_cache=detail_cache), listing_store, indexes,
+                             geocode_cache=geocode_cache, snapshot_path=SNAPSHOT_PATH)
+    print(f"Watching for new listings ({len(properties)} known), press Ctrl+C to stop")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print(f"Stopped after {watcher.polls} polls.")
+    finally:
+        listing_store.close()
+        detail_cache.close()
+        geocode_cache.close()
+
+
+def run_serve(args):
+    """Serve JSON queries over the listings until interrupted"""
+    import asyncio
+    from query_service import QueryService, serve
+
+    properties, _ = load_properties(args.offline, args.regions, args.stop_after_known, args.max_pages)
+    service = QueryService(PropertyIndexes(properties).build_all())
+    closers = []
+    if args.watch:
+        from scraper import PropertyScraper
+        from geocache import GeocodeCache
+        from detail_cache import DetailCache
+        from listing_store import ListingStore
+        from watch import ListingWatcher
+
+        listing_store, detail_cache, geocode_cache = ListingStore(LISTINGS_PATH), DetailCache(), GeocodeCache()
+        closers = [listing_store.close, detail_cache.close, geocode_cache.close]
+        watcher = ListingWatcher(PropertyScraper(detail_cache=detail_cache), listing_store, service.indexes,
+                                 geocode_cache=geocode_cache, snapshot_path=SNAPSHOT_PATH)
+        background = [service.follow_watcher(watcher)]
+    else:
+        # Pick up refreshes written by other runs (e.g. a separate --watch process)
+        background = [service.follow_snapshot(SNAPSHOT_PATH)]
+
+    try:
+        asyncio.run(serve(service, args.host, args.port, background))
+    except KeyboardInterrupt:
+        print("Stopped.")
+    finally:
+        for close in closers:
+            close()
+
+
+def main():
+    arg_parser = build_arg_parser()
+    args = arg_parser.parse_args()
+    if args.radius is not None and not args.near:
+        arg_parser.error("--radius requires --near")
+    if args.serve:
+        run_serve(args)
+        return
+    if args.batch:
+        run_batch(args)
+        return
+    if args.watch:
+        run_watch(args)
+        return
+
+    print("Apartment Rental Finder - Riga (SS.com only)")
+    print("====================================================================================================================")
+
+    unique_rent_properties, new_properties = load_properties(args.offline, args.regions, args.stop_after_known,
+                                                             args.max_pages)
 
-    rent_priority_queue = PriorityQueue(comparator=custom_comparator)
-    pq_build_time_start = datetime.datetime.now()
-    for prop in sorted_rent_properties:
-        rent_priority_queue.insert(prop)
-    pq_build_time = (datetime.datetime.now() - pq_build_time_start).total_seconds()
-    print(f"Priority Queue build time: {pq_build_time:.6f} seconds")
-    print(f"Priority Queue size: {rent_priority_queue.size} elements")
+    # Search structures are built the first time a query needs them
+    indexes = PropertyIndexes(unique_rent_properties)
+    print("Sorting properties by price...")
+    sorted_rent_properties = indexes.sorted_by_price
+    print(f"Sort execution time: {indexes.build_times['sort']:.6f} seconds")
 
     print("\nRENTAL PROPERTY RESULTS:")
     print(f"Total found {len(sorted_rent_properties)} unique rental properties")
@@ -153,7 +224,7 @@ def main():
             print(f"\n=== NEW PROPERTY #{i} ===")
             print(prop)
 
-    print("\nTop 5 cheapest rental properties (via QuickSort):")
+    print("\nTop 5 cheapest rental properties (via sort):")
     if sorted_rent_properties:
         for i in range(min(5, len(sorted_rent_properties))):
             print(f"\n{i+1}. {sorted_rent_properties[i]}")
@@ -161,17 +232,17 @@ def main():
         print("No rental properties found.")
 
     print("\nTop 3 cheapest rental properties (via Min-Heap):")
+    rent_min_heap = indexes.min_heap
     if rent_min_heap.size > 0:
-        for i in range(min(3, rent_min_heap.size)):
-            prop = rent_min_heap.extract_min()
+        for i, prop in enumerate(rent_min_heap.peek_k(3)):
             print(f"\n{i+1}. {prop}")
     else:
         print("No rental properties found.")
 
     print("\nTop 3 properties by priority (utilities included first, then by price):")
+    rent_priority_queue = indexes.priority_queue
     if rent_priority_queue.size > 0:
-        for i in range(min(3, rent_priority_queue.size)):
-            prop = rent_priority_queue.extract()
+        for i, prop in enumerate(rent_priority_queue.peek_k(3)):
             print(f"\n{i+1}. {prop.price} EUR - {prop.title} ({'includes utilities' if prop.utilities_included else 'utilities not included'})")
     else:
         print("No rental properties found.")
@@ -195,8 +266,12 @@ def main():
             try:
                 min_price = float(input("Minimum price: "))
                 max_price = float(input("Maximum price: "))
+                if not indexes.is_built('bst'):
+                    rent_bst = indexes.bst
+                    print(f"BST build time: {indexes.build_times['bst']:.6f} seconds, "
+                          f"size: {rent_bst.size} nodes, height: {rent_bst.stats()['height']}")
                 start_time = datetime.datetime.now()
-                rent_in_range = rent_bst.find_range(min_price, max_price)
+                rent_in_range = indexes.bst.find_range(min_price, max_price)
                 search_time = (datetime.datetime.now() - start_time).total_seconds()
                 print(f"BST range search execution time: {search_time:.6f} seconds")
                 print(f"Found {len(rent_in_range)} properties in price range {min_price}-{max_price} EUR")
@@ -219,7 +294,7 @@ def main():
             try:
                 max_distance = float(input("Maximum distance from center (km): "))
                 start_time = datetime.datetime.now()
-                close_to_center = PropertyFilter.filter_by_distance(sorted_rent_properties, max_distance)
+                close_to_center = indexes.within_distance(max_distance)
                 filter_time = (datetime.datetime.now() - start_time).total_seconds()
                 print(f"Distance filter execution time: {filter_time:.6f} seconds")
                 print(f"Found {len(close_to_center)} properties within {max_distance} km from center")
@@ -232,10 +307,13 @@ def main():
             print("\nData Structure and Algorithm Performance Metrics:")
             print("="*80)
             print(f"Number of rental properties: {len(sorted_rent_properties)}")
-            print(f"QuickSort execution time: {quicksort_time:.6f} seconds")
-            print(f"BST build time: {bst_build_time:.6f} seconds")
-            print(f"Min-Heap build time: {heap_build_time:.6f} seconds")
-            print(f"Priority Queue build time: {pq_build_time:.6f} seconds")
+            labels = {'sort': "Sort execution time", 'bst': "BST build time",
+                      'min_heap': "Min-Heap build time", 'priority_queue': "Priority Queue build time"}
+            for name, label in labels.items():
+                if indexes.is_built(name):
+                    print(f"{label}: {indexes.build_times[name]:.6f} seconds")
+                else:
+                    print(f"{label}: not built (not used yet)")
             print("="*80)
 
         elif choice == '6':
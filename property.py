@@ -1,10 +1,19 @@
 class Property:
     """Property class for rental real estate data"""
 
+    # No per-instance __dict__: keeps large listing histories compact
+    __slots__ = (
+        'id', 'title', 'price', 'address', 'size', 'rooms', 'floor',
+        'has_furniture', 'kitchen_equipment', 'bathroom', 'utilities_included',
+        'distance_to_center', 'time_to_center', 'latitude', 'longitude', 'source_url', 'portal',
+        'published_date', 'has_parking', 'pets_allowed', 'min_rent_term', 'description', 'region'
+    )
+
     def __init__(self, id, title, price, address, size, rooms, floor=None,
                  has_furniture=None, kitchen_equipment=None, bathroom=None,
                  utilities_included=None, source_url=None, portal=None,
-                 published_date=None, has_parking=None, pets_allowed=None, min_rent_term=None):
+                 published_date=None, has_parking=None, pets_allowed=None, min_rent_term=None,
+                 description=None, region=None):
         self.id = id
         self.title = title
         self.price = float(price)
@@ -18,12 +27,16 @@ class Property:
         self.utilities_included = utilities_included
         self.distance_to_center = None
         self.time_to_center = None
+        self.latitude = None
+        self.longitude = None
         self.source_url = source_url
         self.portal = portal
         self.published_date = published_date
         self.has_parking = has_parking
         self.pets_allowed = pets_allowed
         self.min_rent_term = min_rent_term
+        self.description = description
+        self.region = region  # Scrape target the listing came from, e.g. 'riga/all/hand_over'
 
     def __str__(self):
         fields = [
@@ -45,6 +58,7 @@ class Property:
             f"Pets allowed: {'Yes' if self.pets_allowed else 'No'}" if self.pets_allowed is not None else None,
             f"Minimum rental term: {self.min_rent_term}" if self.min_rent_term else None,
             f"Published: {self.published_date}" if self.published_date else None,
+            f"Section: {self.region}" if self.region else None,
             f"Link: {self.source_url}"
         ]
         return "\n".join(filter(None, fields))
@@ -52,6 +66,24 @@ class Property:
     def text_format(self):
         return self.__str__()
 
+    def to_dict(self):
+        """Return all fields as a plain dict (for JSON storage)"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a Property from a dict produced by to_dict"""
+        prop = cls(**{name: data.get(name) for name in (
+            'id', 'title', 'price', 'address', 'size', 'rooms', 'floor', 'has_furniture',
+            'kitchen_equipment', 'bathroom', 'utilities_included', 'source_url', 'portal',
+            'published_date', 'has_parking', 'pets_allowed', 'min_rent_term', 'description', 'region'
+        )})
+        prop.distance_to_center = data.get('distance_to_center')
+        prop.time_to_center = data.get('time_to_center')
+        prop.latitude = data.get('latitude')
+        prop.longitude = data.get('longitude')
+        return prop
+
     def __hash__(self):
         return hash((self.address, self.size, self.rooms, self.price))
 
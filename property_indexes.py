@@ -0,0 +1,189 @@
+import math
+import time
+from bisect import bisect_left, bisect_right, insort
+from data_structures.binary_search_tree import BalancedBinarySearchTree
+from data_structures.heap import MinHeap
+from data_structures.priority_queue import PriorityQueue
+from data_structures.spatial_index import SpatialGrid
+from data_structures.text_index import PropertyTextIndex
+from filtering import PropertyFilter
+
+
+def utilities_first_key(prop):
+    """Priority key: utilities included first, then lower price"""
+    return (not prop.utilities_included, prop.price)
+
+
+def _price(prop):
+    """Sort key of the price-ordered list"""
+    return prop.price
+
+
+def _distance_key(prop):
+    """Sort key of the distance-ordered list"""
+    return (prop.distance_to_center, prop.price)
+
+
+def _remove_identical(items, item, start, end):
+    """Delete item (by identity) from items[start:end]"""
+    for i in range(start, end):
+        if items[i] is item:
+            del items[i]
+            return
+
+
+class PropertyIndexes:
+    """Search structures over one list of properties, each built on first use
+
+    A run that never asks for, say, the priority queue never pays for
+    building it. build_times holds the build time in seconds of every
+    structure that has been built so far. add, remove and replace update
+    the structures already built in place instead of rebuilding them;
+    every change bumps version, so results cached against an older
+    version can be told apart. remove moves the last property into the
+    freed slot, so properties keeps no particular order after removals.
+    """
+
+    def __init__(self, properties):
+        """Wrap properties; nothing is built yet"""
+        self.properties = properties
+        self.by_id = {prop.id: prop for prop in properties}
+        self.positions = {id(prop): i for i, prop in enumerate(properties)}  # id(prop) -> index in properties
+        self.build_times = {}
+        self.version = 0
+        self._built = {}
+
+    def _get(self, name, build):
+        """Return the named structure, building it the first time"""
+        if name not in self._built:
+            start = time.perf_counter()
+            self._built[name] = build()
+            self.build_times[name] = time.perf_counter() - start
+        return self._built[name]
+
+    def get(self, property_id):
+        """Indexed property with the given id, or None"""
+        return self.by_id.get(property_id)
+
+    def add(self, prop):
+        """Add a property to the list and to every structure built so far"""
+        self.positions[id(prop)] = len(self.properties)
+        self.properties.append(prop)
+        self.by_id[prop.id] = prop
+        self.version += 1
+        if 'sort' in self._built:
+            insort(self._built['sort'], prop, key=_price)
+        if 'bst' in self._built:
+            self._built['bst'].insert(prop.price, prop)
+        if 'min_heap' in self._built:
+            self._built['min_heap'].insert(prop)
+        if 'priority_queue' in self._built:
+            self._built['priority_queue'].insert(prop)
+        if 'text' in self._built:
+            self._built['text'].add(prop)
+        if 'distance' in self._built and prop.distance_to_center:
+            insort(self._built['distance'], prop, key=_distance_key)
+        if 'spatial' in self._built and prop.latitude is not None and prop.longitude is not None:
+            self._built['spatial'].insert(prop.latitude, prop.longitude, prop)
+
+    def remove(self, prop):
+        """Remove a property (the same object that was added) everywhere"""
+        i = self.positions.pop(id(prop), None)
+        if i is not None:
+            last = self.properties.pop()
+            if last is not prop:
+                self.properties[i] = last
+                self.positions[id(last)] = i
+        if self.by_id.get(prop.id) is prop:
+            del self.by_id[prop.id]
+        self.version += 1
+        if 'sort' in self._built:
+            by_price = self._built['sort']
+            _remove_identical(by_price, prop, bisect_left(by_price, prop.price, key=_price),
+                              bisect_right(by_price, prop.price, key=_price))
+        if 'bst' in self._built:
+            self._built['bst'].remove(prop.price, prop)
+        if 'min_heap' in self._built:
+            self._built['min_heap'].remove(prop)
+        # Both are keyed by id: only remove prop itself, not a listing that
+        # replaced it under the same id (or an id that was never queued)
+        if 'priority_queue' in self._built and self._built['priority_queue'].get(prop.id) is prop:
+            self._built['priority_queue'].remove(prop.id)
+        if 'text' in self._built and self._built['text'].properties.get(prop.id) is prop:
+            self._built['text'].remove(prop.id)
+        if 'distance' in self._built and prop.distance_to_center:
+            by_distance = self._built['distance']
+            key = _distance_key(prop)
+            _remove_identical(by_distance, prop, bisect_left(by_distance, key, key=_distance_key),
+                              bisect_right(by_distance, key, key=_distance_key))
+        if 'spatial' in self._built and self._built['spatial'].get(prop.id) is prop:
+            self._built['spatial'].remove(prop.id)
+
+    def replace(self, old, new):
+        """Swap in an updated version of a listing (e.g. after a price change)"""
+        self.remove(old)
+        self.add(new)
+
+    def build_all(self):
+        """Build every structure now (for long-running processes); returns self"""
+        self.sorted_by_price, self.bst, self.min_heap, self.priority_queue, self.text_index, self.by_distance
+        self.spatial
+        return self
+
+    def is_built(self, name):
+        """Whether the named structure has been built"""
+        return name in self._built
+
+    @property
+    def sorted_by_price(self):
+        """Properties sorted by price (stable)"""
+        return self._get('sort', lambda: PropertyFilter.sort_by_price_ascending(self.properties))
+
+    @property
+    def bst(self):
+        """Balanced BST keyed by price, for range searches"""
+        return self._get('bst', lambda: BalancedBinarySearchTree.from_sorted(
+            (prop.price, prop) for prop in self.sorted_by_price
+        ))
+
+    @property
+    def min_heap(self):
+        """Min-heap by price"""
+        return self._get('min_heap', lambda: MinHeap.from_iterable(self.properties))
+
+    @property
+    def priority_queue(self):
+        """Priority queue ordered by utilities_first_key"""
+        return self._get('priority_queue', lambda: PriorityQueue.from_iterable(
+            self.properties, key=utilities_first_key
+        ))
+
+    @property
+    def text_index(self):
+        """Inverted index over addresses and descriptions, for district and keyword queries"""
+        return self._get('text', lambda: PropertyTextIndex(self.properties))
+
+    @property
+    def by_distance(self):
+        """Geocoded properties sorted by distance to the center, then price"""
+        return self._get('distance', lambda: sorted(
+            (prop for prop in self.properties if prop.distance_to_center), key=_distance_key
+        ))
+
+    @property
+    def spatial(self):
+        """Grid over geocoded coordinates, for queries around any point"""
+        return self._get('spatial', lambda: SpatialGrid.from_properties(self.properties))
+
+    def near(self, lat, lng, radius_km):
+        """Geocoded properties within radius_km of a point, nearest first"""
+        return [prop for _, prop in self.spatial.within_radius(lat, lng, radius_km)]
+
+    def nearest(self, lat, lng, k):
+        """The k geocoded properties nearest to a point, nearest first"""
+        return [prop for _, prop in self.spatial.nearest(lat, lng, k)]
+
+    def within_distance(self, max_distance):
+        """Geocoded properties at most max_distance km from the center, nearest first"""
+        by_distance = self.by_distance
+        return by_distance[:bisect_right(by_distance, (max_distance, math.inf), key=_distance_key)]
@@ -0,0 +1,304 @@
+import asyncio
+import json
+import os
+import traceback
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+from filtering import PropertyFilter
+from batch import parse_sort_keys
+from property_indexes import PropertyIndexes
+from snapshot import load_snapshot
+
+STATUS_TEXT = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error',
+}
+
+
+class QueryError(ValueError):
+    """Invalid query parameters (answered with HTTP 400)"""
+
+
+def _param(params, name, convert=str, default=None):
+    """Single query parameter converted with convert, or default when absent"""
+    if name not in params:
+        return default
+    try:
+        return convert(params[name][-1])
+    except ValueError:
+        raise QueryError(f"invalid value for {name}: {params[name][-1]!r}")
+
+
+def _point(params):
+    """(lat, lng) query parameters"""
+    lat, lng = _param(params, 'lat', float), _param(params, 'lng', float)
+    if lat is None or lng is None:
+        raise QueryError("lat and lng are required")
+    return lat, lng
+
+
+def _flag(value):
+    """Query string boolean"""
+    if value.lower() in ('1', 'true', 'yes', 'y'):
+        return True
+    if value.lower() in ('0', 'false', 'no', 'n'):
+        return False
+    raise ValueError(value)
+
+
+class QueryService:
+    """JSON queries over in-memory PropertyIndexes, with a per-query response cache
+
+    Responses are cached by path and query string. The cache is dropped
+    whenever the dataset version changes, i.e. when listings are added,
+    updated or removed in place, or a newer snapshot is loaded.
+
+    Endpoints (all GET, list results accept limit):
+      /price?min=300&max=600          BST range search, cheapest first
+      /distance?max=3                 within max km of the center, nearest first
+      /near?lat=56.95&lng=24.1&radius=2   within radius km of a point, nearest first
+      /nearest?lat=56.95&lng=24.1&k=5     k nearest to a point
+      /utilities?included=yes         by utilities, cheapest first
+      /district?name=Teika&name=...   address matches any district, cheapest first
+      /top?k=10&sort=price_per_m2     k best by sort keys (as --sort in batch mode)
+      /listing?id=...                 one listing
+      /stats                          dataset version, sizes and cache counters
+    """
+
+    ROUTES = {
+        '/price': 'query_price', '/distance': 'query_distance', '/utilities': 'query_utilities',
+        '/district': 'query_district', '/top': 'query_top', '/near': 'query_near', '/nearest': 'query_nearest',
+    }
+
+    def __init__(self, indexes, cache_size=1024, default_limit=100):
+        """Serve queries over indexes (build them first with build_all to keep first queries fast)"""
+        self.indexes = indexes
+        self.generation = 0  # Bumped whenever indexes is swapped for a reloaded dataset
+        self.cache = OrderedDict()  # (path, query) -> (status, body), least recently used first
+        self.cache_size = cache_size
+        self.cache_version = self.version
+        self.default_limit = default_limit
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def version(self):
+        """Dataset version: changes whenever a query could return something else"""
+        return f"{self.generation}.{self.indexes.version}"
+
+    def replace_indexes(self, indexes):
+        """Serve a newly loaded dataset"""
+        self.indexes = indexes
+        self.generation += 1
+
+    def handle(self, target):
+        """Answer a GET request target with (status, JSON body bytes)"""
+        url = urlsplit(target)
+        if self.cache_version != self.version:
+            self.cache.clear()
+            self.cache_version = self.version
+        key = (url.path, url.query)
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        self.misses += 1
+        try:
+            status, payload = 200, self._dispatch(url.path, parse_qs(url.query))
+        except QueryError as e:
+            status, payload = 400, {'error': str(e)}
+        except LookupError as e:
+            status, payload = 404, {'error': str(e)}
+        except Exception as e:
+            # A bug in one query must not take the connection (or the server) down
+            traceback.print_exc()
+            status, payload = 500, {'error': f"internal error ({type(e).__name__})"}
+        response = status, json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        if status in (200, 400) and url.path != '/stats':
+            self.cache[key] = response
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return response
+
+    def _dispatch(self, path, params):
+        """Route a request to its query method and wrap the results"""
+        if path == '/stats':
+            return self.stats()
+        if path == '/listing':
+            property_id = _param(params, 'id')
+            prop = self.indexes.get(property_id) if property_id else None
+            if prop is None:
+                raise LookupError(f"no listing {property_id!r}")
+            return {'version': self.version, 'result': prop.to_dict()}
+        if path not in self.ROUTES:
+            raise LookupError(f"unknown endpoint {path}")
+
+        results = getattr(self, self.ROUTES[path])(params)
+        limit = _param(params, 'limit', int, self.default_limit)
+        return {
+            'version': self.version,
+            'total': len(results),
+            'results': [prop.to_dict() for prop in results[:max(limit, 0)]],
+        }
+
+    def query_price(self, params):
+        """Listings in a price range, via the BST"""
+        return self.indexes.bst.find_range(_param(params, 'min', float, float('-inf')),
+                                           _param(params, 'max', float, float('inf')))
+
+    def query_distance(self, params):
+        """Listings within max km of the center, nearest first"""
+        max_distance = _param(params, 'max', float)
+        if max_distance is None:
+            raise QueryError("max is required")
+        return self.indexes.within_distance(max_distance)
+
+    def query_near(self, params):
+        """Listings within radius km of a point, nearest first, via the spatial grid"""
+        radius = _param(params, 'radius', float)
+        if radius is None:
+            raise QueryError("radius is required")
+        return self.indexes.near(*_point(params), radius)
+
+    def query_nearest(self, params):
+        """The k listings nearest to a point, via the spatial grid"""
+        return self.indexes.nearest(*_point(params), _param(params, 'k', int, 10))
+
+    def query_utilities(self, params):
+        """Listings with (or without) utilities included, cheapest first"""
+        included = _param(params, 'included', _flag, True)
+        return PropertyFilter.query(self.indexes.sorted_by_price).utilities_included(included).results()
+
+    def query_district(self, params):
+        """Listings whose address matches any of the districts, cheapest first"""
+        names = params.get('name')
+        if not names:
+            raise QueryError("name is required")
+        return PropertyFilter.sort_by(self.indexes.text_index.filter_by_district(names), 'price')
+
+    def query_top(self, params):
+        """The k best listings by the sort keys"""
+        k = _param(params, 'k', int, 10)
+        sort = params.get('sort', ['price'])
+        if sort == ['price']:
+            return self.indexes.min_heap.peek_k(k)
+        if sort == ['priority']:
+            return self.indexes.priority_queue.peek_k(k)
+        try:
+            keys = parse_sort_keys(sort)
+        except ValueError as e:
+            raise QueryError(str(e))
+        return PropertyFilter.top_k(self.indexes.properties, k, *keys)
+
+    def stats(self):
+        """Dataset and cache counters"""
+        return {
+            'version': self.version,
+            'listings': len(self.indexes.properties),
+            'indexes_built': sorted(self.indexes.build_times),
+            'cache_entries': len(self.cache),
+            'cache_hits': self.hits,
+            'cache_misses': self.misses,
+        }
+
+    @staticmethod
+    def _response(status, body, keep_alive):
+        """HTTP/1.1 response bytes for a JSON body"""
+        return (
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+        )
+
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection (keep-alive)"""
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                    if not request_line:
+                        break
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b'\r\n', b'\n', b''):
+                            break
+                        name, _, value = line.decode('latin-1').partition(':')
+                        headers[name.strip().lower()] = value.strip()
+                except ValueError:
+                    # readline raises ValueError for a line over the stream limit;
+                    # the rest of the request cannot be framed, so answer and close
+                    writer.write(self._response(400, b'{"error": "request line or header too long"}', False))
+                    await writer.drain()
+                    break
+
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    status, body = 400, b'{"error": "malformed request line"}'
+                    http_version = 'HTTP/1.0'
+                else:
+                    method, target, http_version = parts
+                    if method != 'GET':
+                        status, body = 405, b'{"error": "only GET is supported"}'
+                    else:
+                        status, body = self.handle(target)
+
+                keep_alive = http_version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                writer.write(self._response(status, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    async def follow_snapshot(self, path, interval=2.0):
+        """Reload the dataset whenever the snapshot file is rewritten (e.g. by a --watch run)"""
+        loop = asyncio.get_running_loop()
+        last_modified = os.path.getmtime(path) if os.path.exists(path) else None
+        while True:
+            await asyncio.sleep(interval)
+            modified = os.path.getmtime(path) if os.path.exists(path) else None
+            if modified == last_modified:
+                continue
+            properties = await loop.run_in_executor(None, load_snapshot, path)
+            if properties is not None:
+                last_modified = modified
+                # Built off the event loop, so requests keep being served meanwhile
+                indexes = await loop.run_in_executor(None, PropertyIndexes(properties).build_all)
+                self.replace_indexes(indexes)
+
+    async def follow_watcher(self, watcher, report=print):
+        """Poll with a ListingWatcher, applying its changes between requests
+
+        Fetching and persisting run in worker threads; the indexes are
+        only changed on the event loop, so no request sees them half updated.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                changes = await loop.run_in_executor(None, watcher.fetch_changes)
+                if changes:
+                    watcher.apply_changes(changes)
+                    await loop.run_in_executor(None, watcher.persist, changes, list(self.indexes.properties))
+            except Exception as e:
+                watcher.record_error(e, report)
+            else:
+                watcher.record(changes, report)
+            await asyncio.sleep(watcher.scheduler.next_delay())
+
+
+async def serve(service, host='127.0.0.1', port=8765, background=()):
+    """Run the HTTP server (and background coroutines) until cancelled"""
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in background]
+    address = server.sockets[0].getsockname()
+    print(f"Serving {len(service.indexes.properties)} listings on http://{address[0]}:{address[1]}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,36 @@
+import re
+from collections import namedtuple
+
+TARGET_SLUG = re.compile(r'^[a-z0-9_-]+$')
+
+
+class ScrapeTarget(namedtuple('ScrapeTarget', ['region', 'area', 'deal'])):
+    """One ss.com flats section: region, area within it and deal type
+
+    Written as 'region/area/deal' following the ss.com URL, e.g.
+    'riga/all/hand_over' (Riga rentals), 'riga/centre/hand_over' or
+    'jurmala/all/sell'; area and deal default to 'all' and 'hand_over'.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, spec):
+        """Target from a 'region[/area[/deal]]' string; raises ValueError"""
+        parts = spec.strip().strip('/').lower().split('/')
+        if len(parts) > 3 or not all(TARGET_SLUG.match(part) for part in parts):
+            raise ValueError(f"invalid scrape target {spec!r}, expected region[/area[/deal]]")
+        return cls(*parts, *('all', 'hand_over')[len(parts) - 1:])
+
+    @property
+    def label(self):
+        """'region/area/deal', the value listings are tagged with"""
+        return '/'.join(self)
+
+    @property
+    def url(self):
+        """First listing page of the section"""
+        return f"https://www.ss.com/en/real-estate/flats/{self.label}/"
+
+
+DEFAULT_TARGET = ScrapeTarget('riga', 'all', 'hand_over')
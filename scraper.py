@@ -1,15 +1,47 @@
-import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+import contextlib
+import importlib.util
 import re
 import time
 import random
 import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 from property import Property
+from http_client import RequestBudget, get_client
+from scrape_target import DEFAULT_TARGET, ScrapeTarget
+from data_structures.text_index import AMENITY_TERMS, tokenize
+
+# lxml is several times faster than the pure-Python html.parser, use it when installed
+DEFAULT_PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+# Restricted parsing: only the tags the scraper reads are turned into a tree
+LIST_PAGE_STRAINER = SoupStrainer(['tr', 'a'])
+DETAIL_PAGE_STRAINER = SoupStrainer(id='msg_div_msg')
+
+ADDRESS_LABELS = ('Address:', 'District:', 'Region:')
+
+# Word pairs (normalized tokens, see text_index.tokenize) that set detail flags
+PETS_ALLOWED_PHRASES = {('pets', 'allowed'), ('zhivotnye', 'razresheny'), ('dzivnieki', 'atlauti')}
+UTILITIES_INCLUDED_PHRASES = {('utilities', 'included'), ('including', 'utilities')}
+YEAR_TERM_PHRASES = {('one', 'year'), ('1', 'year'), ('na', 'god'), ('uz', 'gadu')}
+HALF_YEAR_TERM_PHRASES = {('6', 'months'), ('6', 'menesi'), ('6', 'mesjacev')}
+# Tokens that negate the word after them ("bez mēbelēm", "without furniture", "без мебели")
+NEGATIONS = {'bez', 'no', 'without', 'not', 'ne', 'net'}
+
 
 class PropertyScraper:
-    """Class for obtaining rental properties from SS.com (Rīga only)"""
+    """Class for obtaining properties from SS.com flats sections (Rīga rentals by default)"""
 
-    def __init__(self):
+    LIST_URL = DEFAULT_TARGET.url
+
+    def __init__(self, http_client=None, detail_cache=None, parser=DEFAULT_PARSER):
+        self.http = http_client or get_client()
+        self.parser = parser
+        self.detail_cache = detail_cache
+        self.list_page_etag = None  # Validator of the last listing page read by poll_ss_com
+        self.failed_targets = []  # Targets whose listing page the last iter_targets run could not read
         user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15',
@@ -24,129 +56,398 @@ class PropertyScraper:
             'Referer': 'https://www.google.com/'
         }
 
-    def scrape_ss_com(self, max_price=1500):
-        properties = []
-        url = "https://www.ss.com/en/real-estate/flats/riga/all/hand_over/"
+    def scrape_ss_com(self, max_price=1500, workers=1, max_per_host=4):
+        """Scrape rental listings from SS.com.
 
+        With workers > 1 the detail pages are fetched concurrently by a thread
+        pool, while at most max_per_host requests run against one host at a
+        time. The result keeps the order of the listing page either way.
+        """
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self.http.get(self.LIST_URL, headers=self.headers)
             if response.status_code != 200:
                 return []
 
-            soup = BeautifulSoup(response.content, 'html.parser')
-            ads = soup.select('tr[id^=tr_]')
-
-            for ad in ads:
-                try:
-                    link_tag = ad.select_one('a')
-                    if not link_tag or not link_tag.get('href'):
-                        continue
-
-                    link = link_tag['href']
-                    if not link.startswith('http'):
-                        link = "https://www.ss.com" + link
-
-                    title = link_tag.text.strip()
-                    price_cell = ad.select_one('td:nth-last-child(1)')
-                    if not price_cell:
-                        continue
-
-                    price_text = price_cell.text.strip().replace(' ', '')
-                    price_match = re.search(r'(\d+)', price_text)
-                    if not price_match:
-                        continue
-
-                    price = float(price_match.group(1))
-                    if price > max_price:
-                        continue
-
-                    property_details = self._get_ss_property_details(link)
-                    if not property_details:
-                        continue
-
-                    property_obj = Property(
-                        id=link.split('/')[-2] if '/' in link else f"ss_{random.randint(1000, 9999)}",
-                        title=title,
-                        price=price,
-                        address=property_details.get('address', 'Riga'),
-                        size=property_details.get('size', 50),
-                        rooms=property_details.get('rooms', 1),
-                        floor=property_details.get('floor', None),
-                        has_furniture=property_details.get('has_furniture', None),
-                        kitchen_equipment=property_details.get('kitchen_equipment', []),
-                        bathroom=property_details.get('bathroom', None),
-                        utilities_included=property_details.get('utilities_included', None),
-                        source_url=link,
-                        portal="ss.com",
-                        published_date=property_details.get('published_date', None),
-                        has_parking=property_details.get('has_parking', None),
-                        pets_allowed=property_details.get('pets_allowed', None),
-                        min_rent_term=property_details.get('min_rent_term', None)
-                    )
-
-                    properties.append(property_obj)
-                except Exception:
+            soup = self._parse_list_page(response.content)
+            listings = self._parse_listing_rows(soup, max_price, DEFAULT_TARGET.label)
+        except Exception:
+            return []
+
+        return list(self._fetch_properties(listings, workers, max_per_host))
+
+    def scrape_targets(self, targets, max_price=1500, workers=4, budget=None,
+                       known_ids=None, stop_after_known=5, max_pages=1):
+        """Scrape several sections in parallel; see iter_targets"""
+        return list(self.iter_targets(targets, max_price, workers, budget, known_ids, stop_after_known, max_pages))
+
+    def iter_ss_com(self, max_price=1500, known_ids=None, stop_after_known=5,
+                    max_pages=None, workers=1, max_per_host=4, target=DEFAULT_TARGET):
+        """Walk all listing pages and yield Property objects as they are parsed.
+
+        Ads whose id is in known_ids are not downloaded again. The walk stops
+        once stop_after_known consecutive known ads have been seen, so a
+        refresh only reads the new head of the feed.
+        """
+        pages = self._iter_list_pages(target, max_price, known_ids or set(), stop_after_known, max_pages)
+        while True:
+            try:
+                listings = next(pages, None)
+            except Exception:
+                return
+            if listings is None:
+                return
+            yield from self._fetch_properties(listings, workers, max_per_host)
+
+    def _iter_list_pages(self, target, max_price, known_ids, stop_after_known, max_pages, budget=None):
+        """Yield the listing rows of unknown ads page by page, following rel=next
+
+        Raises if the first page cannot be read; an unreadable later page
+        ends the walk. Known ads count towards stop_after_known whatever
+        their price.
+        """
+        if target.deal != 'hand_over':
+            max_price = float('inf')
+        url = target.url
+        visited = set()
+        consecutive_known = 0
+
+        while url and url not in visited:
+            if max_pages is not None and len(visited) >= max_pages:
+                return
+            visited.add(url)
+
+            try:
+                with budget.slot() if budget else contextlib.nullcontext():
+                    response = self.http.get(url, headers=self.headers)
+                response.raise_for_status()
+                soup = self._parse_list_page(response.content)
+            except Exception:
+                if len(visited) == 1:
+                    raise
+                return
+            listings = self._parse_listing_rows(soup, float('inf'), target.label)
+            url = self._next_page_url(soup)
+
+            if not listings:
+                return
+
+            new_listings = []
+            for listing in listings:
+                if self._ad_id(listing[0]) in known_ids:
+                    consecutive_known += 1
+                    if consecutive_known >= stop_after_known:
+                        break
+                else:
+                    consecutive_known = 0
+                    if listing[2] <= max_price:
+                        new_listings.append(listing)
+
+            yield new_listings
+
+            if consecutive_known >= stop_after_known:
+                return
+
+    def iter_targets(self, targets, max_price=1500, workers=4, budget=None,
+                     known_ids=None, stop_after_known=5, max_pages=1):
+        """Scrape the listing pages of each target and yield its properties
+
+        targets are ScrapeTarget objects or 'region/area/deal' strings. Only
+        the first page is read unless max_pages allows more; ads in
+        known_ids are skipped and end the walk as in iter_ss_com. The
+        listing pages are read in parallel, then the detail pages of all
+        targets are fetched by one pool of workers. Every request, whichever
+        target it belongs to, draws from one RequestBudget, so adding
+        targets does not make the scraper less polite. An ad listed in
+        several targets is fetched once and tagged with the first of them
+        (Property.region). Properties are yielded in target order, then
+        listing page order. max_price is a monthly rent, so it only limits
+        rental (hand_over) sections. Targets whose listing page cannot be
+        read are skipped and collected in self.failed_targets.
+        """
+        targets = list(dict.fromkeys(
+            target if isinstance(target, ScrapeTarget) else ScrapeTarget.parse(target) for target in targets
+        ))
+        budget = budget or RequestBudget()
+        self.failed_targets = []
+
+        def fetch(listing):
+            if self._is_cached(listing[0]):
+                return self._fetch_property(*listing)
+            with budget.slot():
+                return self._fetch_property(*listing)
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            pages = list(executor.map(
+                lambda target: self._read_target(target, max_price, budget, known_ids or set(), stop_after_known,
+                                                 max_pages),
+                targets
+            ))
+            seen = set()
+            listings = []
+            for target, rows in zip(targets, pages):
+                if rows is None:
+                    self.failed_targets.append(target)
                     continue
+                for listing in rows:
+                    ad_id = self._ad_id(listing[0])
+                    if ad_id not in seen:
+                        seen.add(ad_id)
+                        listings.append(listing)
 
-                time.sleep(random.uniform(0.3, 0.5))
+            for property_obj in executor.map(fetch, listings):
+                if property_obj:
+                    yield property_obj
 
+    def _read_target(self, target, max_price, budget, known_ids, stop_after_known, max_pages):
+        """Listing rows of a target's pages, or None when its first page cannot be read"""
+        try:
+            return [listing for listings in self._iter_list_pages(target, max_price, known_ids, stop_after_known,
+                                                                  max_pages, budget)
+                    for listing in listings]
         except Exception:
+            return None
+
+    def poll_ss_com(self, known_prices, max_price=1500, workers=1, max_per_host=4):
+        """Read the first listing page and fetch only new or re-priced ads
+
+        known_prices maps ad id -> last known price. Returns Property objects
+        for ads that are not known or whose price changed. The page is
+        requested conditionally, so an unchanged page (HTTP 304) costs no
+        parsing. Unlike scrape_ss_com, request errors are raised so a
+        polling caller can back off.
+        """
+        headers = dict(self.headers)
+        if self.list_page_etag:
+            headers['If-None-Match'] = self.list_page_etag
+        response = self.http.get(self.LIST_URL, headers=headers)
+        if response.status_code == 304:
             return []
+        response.raise_for_status()
+        self.list_page_etag = response.headers.get('ETag')
+
+        listings = [
+            listing for listing in self._parse_listing_rows(self._parse_list_page(response.content), max_price,
+                                                            DEFAULT_TARGET.label)
+            if known_prices.get(self._ad_id(listing[0])) != listing[2]
+        ]
+        return list(self._fetch_properties(listings, workers, max_per_host))
+
+    def _fetch_properties(self, listings, workers, max_per_host):
+        """Fetch detail pages for listings, yielding properties in listing order"""
+        if workers <= 1:
+            for listing in listings:
+                cached = self._is_cached(listing[0])
+                property_obj = self._fetch_property(*listing)
+                if property_obj:
+                    yield property_obj
+                if not cached:
+                    time.sleep(random.uniform(0.3, 0.5))
+            return
+
+        host_slots = {}
+        host_slots_lock = threading.Lock()
+
+        def fetch(listing):
+            link = listing[0]
+            if self._is_cached(link):
+                return self._fetch_property(*listing)
+            host = urlparse(link).netloc
+            with host_slots_lock:
+                slot = host_slots.setdefault(host, threading.BoundedSemaphore(max_per_host))
+            with slot:
+                property_obj = self._fetch_property(*listing)
+                time.sleep(random.uniform(0.3, 0.5))
+            return property_obj
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for property_obj in executor.map(fetch, listings):
+                if property_obj:
+                    yield property_obj
+
+    def _is_cached(self, link):
+        """Whether the ad's details can be served from the cache without a request"""
+        if self.detail_cache is None:
+            return False
+        entry = self.detail_cache.get(self._ad_id(link))
+        return entry is not None and self.detail_cache.is_fresh(entry)
+
+    @staticmethod
+    def _next_page_url(soup):
+        """Return the absolute URL of the next listing page, if any"""
+        next_link = soup.select_one('a[rel=next]')
+        if not next_link or not next_link.get('href'):
+            return None
+        href = next_link['href']
+        return href if href.startswith('http') else "https://www.ss.com" + href
+
+    @staticmethod
+    def _ad_id(link):
+        """Return the ad id from an ad URL (file name without .html)"""
+        name = link.rstrip('/').rsplit('/', 1)[-1]
+        return name[:-5] if name.endswith('.html') else name
+
+    def _parse_listing_rows(self, soup, max_price, region=None):
+        """Return (link, title, price, region) for every ad row on a listing page"""
+        listings = []
+        for ad in soup.select('tr[id^=tr_]'):
+            try:
+                link_tag = ad.select_one('a')
+                if not link_tag or not link_tag.get('href'):
+                    continue
+
+                link = link_tag['href']
+                if not link.startswith('http'):
+                    link = "https://www.ss.com" + link
+
+                title = link_tag.text.strip()
+                price_cell = ad.select_one('td:nth-last-child(1)')
+                if not price_cell:
+                    continue
+
+                price_text = price_cell.text.strip().replace(' ', '')
+                price_match = re.search(r'(\d+)', price_text)
+                if not price_match:
+                    continue
+
+                price = float(price_match.group(1))
+                if price > max_price:
+                    continue
+
+                listings.append((link, title, price, region))
+            except Exception:
+                continue
+        return listings
+
+    @staticmethod
+    def _parse_options(soup):
+        """Collect (label, value) pairs of the options table in one pass over its cells"""
+        cells = soup.find_all('td')
+        options = []
+        for i in range(len(cells) - 1):
+            label = cells[i].string
+            if label and label.strip().endswith(':'):
+                options.append((label.strip(), cells[i + 1].text.strip()))
+        return options
+
+    @staticmethod
+    def _option_value(options, name):
+        """Return the value of the first option whose label contains name"""
+        return next((value for label, value in options if name in label), None)
 
-        return properties
+    def _fetch_property(self, link, title, price, region=None):
+        """Fetch the detail page of one ad and build a Property from it"""
+        try:
+            property_details = self._get_ss_property_details(link)
+            if not property_details:
+                return None
+
+            return Property(
+                id=self._ad_id(link) if '/' in link else f"ss_{random.randint(1000, 9999)}",
+                title=title,
+                price=price,
+                address=property_details.get('address', 'Riga'),
+                size=property_details.get('size', 50),
+                rooms=property_details.get('rooms', 1),
+                floor=property_details.get('floor', None),
+                has_furniture=property_details.get('has_furniture', None),
+                kitchen_equipment=property_details.get('kitchen_equipment', []),
+                bathroom=property_details.get('bathroom', None),
+                utilities_included=property_details.get('utilities_included', None),
+                source_url=link,
+                portal="ss.com",
+                published_date=property_details.get('published_date', None),
+                has_parking=property_details.get('has_parking', None),
+                pets_allowed=property_details.get('pets_allowed', None),
+                min_rent_term=property_details.get('min_rent_term', None),
+                description=property_details.get('description', None),
+                region=region
+            )
+        except Exception:
+            return None
 
     def _get_ss_property_details(self, url):
-        details = {}
+        """Return parsed details of an ad, using the detail cache when available"""
+        cache = self.detail_cache
+        ad_id = self._ad_id(url)
+        entry = cache.get(ad_id) if cache is not None else None
+        if entry is not None and cache.is_fresh(entry):
+            return entry['details']
+
+        headers = dict(self.headers)
+        if entry is not None:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+
         try:
-            response = requests.get(url, headers=self.headers)
-            if response.status_code != 200:
-                return details
+            response = self.http.get(url, headers=headers)
+        except Exception:
+            return {}
 
-            soup = BeautifulSoup(response.content, 'html.parser')
+        if response.status_code == 304 and entry is not None:
+            cache.touch(ad_id)
+            return entry['details']
+        if response.status_code != 200:
+            return {}
 
-            address_row = soup.find('td', string=re.compile('Address:|District:|Region:'))
-            if address_row and address_row.find_next('td'):
-                details['address'] = address_row.find_next('td').text.strip()
-            else:
-                details['address'] = "Riga"
+        details = self._parse_ss_property_details(response.content)
+        if cache is not None and 'published_date' in details:
+            cache.put(ad_id, url, details,
+                      etag=response.headers.get('ETag'),
+                      last_modified=response.headers.get('Last-Modified'))
+        return details
 
-            size_row = soup.find('td', string=re.compile('Area:'))
-            if size_row and size_row.find_next('td'):
-                size_text = size_row.find_next('td').text.strip()
-                size_match = re.search(r'(\d+(?:\.\d+)?)', size_text)
-                details['size'] = float(size_match.group(1)) if size_match else 50
-            else:
-                details['size'] = 50
+    def _parse_list_page(self, content):
+        """Parse only the table rows and links of a listing page"""
+        return BeautifulSoup(content, self.parser, parse_only=LIST_PAGE_STRAINER)
 
-            rooms_row = soup.find('td', string=re.compile('Rooms:'))
-            if rooms_row and rooms_row.find_next('td'):
-                rooms_text = rooms_row.find_next('td').text.strip()
-                rooms_match = re.search(r'(\d+)', rooms_text)
-                details['rooms'] = int(rooms_match.group(1)) if rooms_match else 1
-            else:
-                details['rooms'] = 1
+    def _parse_ss_property_details(self, content):
+        """Parse an ad detail page into a details dict"""
+        details = {}
+        try:
+            # The description and the options table both live in #msg_div_msg,
+            # fall back to the whole document for pages laid out differently
+            soup = BeautifulSoup(content, self.parser, parse_only=DETAIL_PAGE_STRAINER)
+            options = self._parse_options(soup)
+            if not options:
+                soup = BeautifulSoup(content, self.parser)
+                options = self._parse_options(soup)
 
-            floor_row = soup.find('td', string=re.compile('Floor:'))
-            if floor_row and floor_row.find_next('td'):
-                floor_text = floor_row.find_next('td').text.strip()
-                floor_match = re.search(r'(\d+)', floor_text)
-                details['floor'] = int(floor_match.group(1)) if floor_match else None
-            else:
-                details['floor'] = None
+            address = next((value for label, value in options
+                            if any(name in label for name in ADDRESS_LABELS)), None)
+            details['address'] = address if address is not None else "Riga"
+
+            size_text = self._option_value(options, 'Area:')
+            size_match = re.search(r'(\d+(?:\.\d+)?)', size_text) if size_text is not None else None
+            details['size'] = float(size_match.group(1)) if size_match else 50
+
+            rooms_text = self._option_value(options, 'Rooms:')
+            rooms_match = re.search(r'(\d+)', rooms_text) if rooms_text is not None else None
+            details['rooms'] = int(rooms_match.group(1)) if rooms_match else 1
+
+            floor_text = self._option_value(options, 'Floor:')
+            floor_match = re.search(r'(\d+)', floor_text) if floor_text is not None else None
+            details['floor'] = int(floor_match.group(1)) if floor_match else None
 
             description = soup.find('div', id='msg_div_msg') or soup.find('div', class_='ads_opt')
             if description:
-                desc_text = description.text.lower()
-                details['has_furniture'] = any(k in desc_text for k in ['furnished', 'with furniture', 'мебел', 'ar mēbelēm'])
-                details['has_parking'] = any(k in desc_text for k in ['parking', 'парковка', 'stāvvieta', 'autostāvvieta'])
-                details['pets_allowed'] = any(k in desc_text for k in ['pets allowed', 'животные разрешены', 'dzīvnieki atļauti'])
-                if any(k in desc_text for k in ['one year', '1 year', 'на год', 'uz gadu']):
+                details['description'] = description.text.strip()
+                # One tokenization (as in the text index), then set lookups per flag
+                tokens = tokenize(description.text)
+                # A word right after a negation is not a mention ("no parking")
+                words = {word for previous, word in zip([None] + tokens, tokens) if previous not in NEGATIONS}
+                pairs = set(zip(tokens, tokens[1:]))
+                details['has_furniture'] = any(word.startswith(AMENITY_TERMS['furniture']) for word in words)
+                details['has_parking'] = any(word.startswith(AMENITY_TERMS['parking']) for word in words)
+                details['pets_allowed'] = not pairs.isdisjoint(PETS_ALLOWED_PHRASES)
+                if not pairs.isdisjoint(YEAR_TERM_PHRASES):
                     details['min_rent_term'] = '1 year'
-                elif any(k in desc_text for k in ['6 months', '6 mēneši', '6 месяцев']):
+                elif not pairs.isdisjoint(HALF_YEAR_TERM_PHRASES):
                     details['min_rent_term'] = '6 months'
                 else:
                     details['min_rent_term'] = None
-                details['utilities_included'] = 'utilities included' in desc_text or 'including utilities' in desc_text
+                details['utilities_included'] = not pairs.isdisjoint(UTILITIES_INCLUDED_PHRASES)
             else:
                 details.update({'has_furniture': None, 'has_parking': None, 'pets_allowed': None, 'min_rent_term': None, 'utilities_included': False})
 
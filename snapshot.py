@@ -0,0 +1,42 @@
+import os
+import pickle
+
+SNAPSHOT_PATH = 'listings.snapshot'
+SNAPSHOT_VERSION = 2
+
+
+def save_snapshot(properties, path=SNAPSHOT_PATH):
+    """Write properties to a pickle snapshot for fast query-only start-up
+
+    The file is written next to the target and renamed over it, so a
+    reader never sees a half-written snapshot.
+    """
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        pickle.dump({'version': SNAPSHOT_VERSION, 'properties': list(properties)}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+
+def load_snapshot(path=SNAPSHOT_PATH, source_path=None):
+    """Properties from a snapshot, or None if it is missing, unreadable or stale
+
+    A snapshot older than source_path (the listing store it was taken
+    from, including its write-ahead log) is treated as stale.
+    """
+    try:
+        snapshot_time = os.path.getmtime(path)
+    except OSError:
+        return None
+    if source_path:
+        for source in (source_path, source_path + '-wal'):
+            if os.path.exists(source) and os.path.getmtime(source) > snapshot_time:
+                return None
+    try:
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(data, dict) or data.get('version') != SNAPSHOT_VERSION:
+        return None
+    return data['properties']
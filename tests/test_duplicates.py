@@ -0,0 +1,48 @@
+from filtering import PropertyFilter
+from property import Property
+
+
+def make_property(id, price, size, address="Brīvības iela 10", rooms=2):
+    return Property(id=id, title=f"Flat {id}", price=price, address=address, size=size, rooms=rooms)
+
+
+def group_ids(groups):
+    return [[prop.id for prop in group] for group in groups]
+
+
+def test_groups_within_size_and_price_tolerance():
+    properties = [
+        make_property('a', 500, 50),
+        make_property('b', 480, 51.5),   # Within 2 m2 and 10% of a: cheaper, so listed first
+        make_property('c', 500, 53),     # 3 m2 larger than a
+        make_property('d', 600, 50),     # Price differs by more than 10%
+        make_property('e', 505, 52.5),   # Close to c, not to a
+    ]
+
+    groups = PropertyFilter.find_duplicate_groups(properties)
+
+    assert group_ids(groups) == [['b', 'a'], ['c', 'e'], ['d']]
+
+
+def test_blocks_are_never_merged():
+    properties = [
+        make_property('a', 500, 50),
+        make_property('b', 500, 50, address="Brīvības iela 12"),
+        make_property('c', 500, 50, rooms=3),
+        make_property('d', 500, 50, address="brivibas st. 10"),  # Same address once normalized
+    ]
+
+    groups = PropertyFilter.find_duplicate_groups(properties)
+
+    assert group_ids(groups) == [['a', 'd'], ['b'], ['c']]
+
+
+def test_remove_duplicates_keeps_the_cheapest_of_each_group():
+    properties = [
+        make_property('a', 500, 50),
+        make_property('b', 490, 51),
+        make_property('c', 700, 80, address="Tērbatas iela 5"),
+    ]
+
+    assert [prop.id for prop in PropertyFilter.remove_duplicates(properties)] == ['b', 'c']
+    assert PropertyFilter.remove_duplicates([]) == []
@@ -0,0 +1,38 @@
+import geocache
+from geocache import GeocodeCache
+
+
+def test_hits_rewrite_last_used_once_per_touch_interval(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(geocache.time, 'time', lambda: now[0])
+    cache = GeocodeCache(':memory:', touch_interval=3600)
+    cache.put("Brīvības iela 1", 56.95, 24.12, 1.5, 20)
+    writes = cache._conn.total_changes
+
+    for _ in range(100):
+        now[0] += 10
+        assert cache.get("brīvības iela 1") == (56.95, 24.12, 1.5, 20)
+    assert cache._conn.total_changes == writes
+
+    now[0] += 3600
+    cache.get("Brīvības iela 1")
+    assert cache._conn.total_changes == writes + 1
+    assert cache.stats()['hits'] == 101
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(geocache.time, 'time', lambda: now[0])
+    cache = GeocodeCache(':memory:', max_entries=2, touch_interval=60)
+    cache.put("a", 1, 1, 1, 1)
+    now[0] += 100
+    cache.put("b", 2, 2, 2, 2)
+    now[0] += 100
+    cache.get("a")  # Older than touch_interval, so it becomes the most recently used
+    cache.put("c", 3, 3, 3, 3)
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+    cache.close()
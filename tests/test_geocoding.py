@@ -0,0 +1,87 @@
+import pytest
+
+import utils
+from geocache import GeocodeCache
+from property import Property
+
+
+class FakeClock:
+    """Stands in for time.monotonic/time.sleep so interval checks do not wait"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class StubGeocoder:
+    """Records the time of every lookup and returns fixed coordinates"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.calls = []
+
+    def __call__(self, address):
+        self.calls.append((address, self.clock.monotonic()))
+        self.clock.now += 0.1  # Request latency
+        return 56.95, 24.12
+
+
+def make_property(id, address):
+    return Property(id=id, title=f"Flat {id}", price=400, address=address, size=50, rooms=2)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(utils.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(utils.time, 'sleep', clock.sleep)
+    return clock
+
+
+def test_one_lookup_per_distinct_address(clock):
+    properties = [
+        make_property('1', "Brīvības iela 10"),
+        make_property('2', "brīvības iela, 10"),
+        make_property('3', "Tērbatas iela 5"),
+        make_property('4', "Brīvības iela 10"),
+    ]
+    geocoder = StubGeocoder(clock)
+
+    stats = utils.geocode_properties(properties, geocoder=geocoder)
+
+    assert [address for address, _ in geocoder.calls] == ["Brīvības iela 10", "Tērbatas iela 5"]
+    assert stats == {'properties': 4, 'addresses': 2, 'requests': 2}
+    assert all(prop.latitude == 56.95 and prop.distance_to_center is not None for prop in properties)
+
+
+def test_minimum_interval_between_lookups(clock):
+    properties = [make_property(str(i), f"Street {i}") for i in range(5)]
+    geocoder = StubGeocoder(clock)
+
+    utils.geocode_properties(properties, geocoder=geocoder)
+
+    times = [when for _, when in geocoder.calls]
+    assert len(times) == 5
+    assert all(later - earlier >= utils.NOMINATIM_MIN_INTERVAL for earlier, later in zip(times, times[1:]))
+    assert utils.NOMINATIM_MIN_INTERVAL == 1.0
+
+
+def test_cached_addresses_are_not_looked_up_again(clock, tmp_path):
+    cache = GeocodeCache(str(tmp_path / 'geocode.sqlite'))
+    try:
+        first = StubGeocoder(clock)
+        utils.geocode_properties([make_property('1', "Street 1")], geocoder=first, cache=cache)
+        second = StubGeocoder(clock)
+        stats = utils.geocode_properties(
+            [make_property('2', "street 1"), make_property('3', "Street 2")], geocoder=second, cache=cache
+        )
+    finally:
+        cache.close()
+
+    assert [address for address, _ in second.calls] == ["Street 2"]
+    assert stats['requests'] == 1
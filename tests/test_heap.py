@@ -0,0 +1,36 @@
+import random
+
+from data_structures.heap import MaxHeap, MinHeap
+from property import Property
+
+
+def make_properties(count, seed=0):
+    rng = random.Random(seed)
+    return [Property(id=str(i), title=f"Flat {i}", price=rng.randrange(200, 800, 25), address=f"Street {i}",
+                     size=50, rooms=2)
+            for i in range(count)]
+
+
+def check_positions(heap):
+    assert heap.positions == {id(item): i for i, item in enumerate(heap.heap)}
+
+
+def test_remove_keeps_positions_and_order():
+    rng = random.Random(1)
+    for heap_class, extract, reverse in ((MinHeap, MinHeap.extract_min, False), (MaxHeap, MaxHeap.extract_max, True)):
+        properties = make_properties(200)
+        heap = heap_class.from_iterable(properties[:100])
+        live = list(properties[:100])
+        for prop in properties[100:]:
+            heap.insert(prop)
+            live.append(prop)
+            removed = live.pop(rng.randrange(len(live)))
+            assert heap.remove(removed)
+            assert not heap.remove(removed)
+            check_positions(heap)
+        live.remove(extract(heap))
+        check_positions(heap)
+
+        prices = [extract(heap).price for _ in range(heap.size)]
+        assert prices == sorted((prop.price for prop in live), reverse=reverse)
+        assert heap.positions == {}
@@ -0,0 +1,87 @@
+import pytest
+
+import scraper
+from http_client import RequestBudget
+from listing_store import ListingStore
+from property import Property
+from scrape_target import DEFAULT_TARGET
+from scraper import PropertyScraper
+
+
+class Response:
+    def __init__(self, content, status_code=200):
+        self.content = content.encode()
+        self.status_code = status_code
+        self.headers = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise IOError(f"HTTP {self.status_code}")
+
+
+ROW = '<tr id="tr_{id}"><td><a href="/msg/en/real-estate/flats/riga/centre/{id}.html">Flat {id}</a></td><td>{price} €</td></tr>'
+DETAIL = ('<div id="msg_div_msg">Flat<table><tr><td>Address:</td><td>Street {id}</td></tr>'
+          '<tr><td>Area:</td><td>50 m²</td></tr></table></div>')
+PAGE_2 = DEFAULT_TARGET.url + "page2.html"
+PAGE_3 = DEFAULT_TARGET.url + "page3.html"
+# Recorded listing pages, newest ads first; like ss.com, the last page links back to the first
+PAGES = {
+    DEFAULT_TARGET.url: ([('1', 400), ('2', 2000), ('3', 500)], PAGE_2),
+    PAGE_2: ([('4', 450), ('5', 600), ('6', 700)], PAGE_3),
+    PAGE_3: ([('7', 300)], DEFAULT_TARGET.url),
+}
+
+
+class FakeClient:
+    def __init__(self):
+        self.pages_read = []
+
+    def get(self, url, **kwargs):
+        if url in PAGES:
+            self.pages_read.append(url)
+            rows, next_url = PAGES[url]
+            return Response("<table>" + "".join(ROW.format(id=id, price=price) for id, price in rows) + "</table>"
+                            f'<a rel="next" href="{next_url.replace("https://www.ss.com", "")}">Next</a>')
+        if url.endswith('.html'):
+            return Response(DETAIL.format(id=url.rsplit('/', 1)[1][:-5]))
+        return Response("", 503)
+
+
+@pytest.fixture(autouse=True)
+def no_politeness_delay(monkeypatch):
+    monkeypatch.setattr(scraper.time, 'sleep', lambda seconds: None)
+
+
+def test_walk_follows_next_links_until_the_first_page_comes_back():
+    client = FakeClient()
+
+    properties = list(PropertyScraper(http_client=client).iter_ss_com(max_price=1500, workers=2))
+
+    assert [prop.id for prop in properties] == ['1', '3', '4', '5', '6', '7']
+    assert client.pages_read == [DEFAULT_TARGET.url, PAGE_2, PAGE_3]
+
+
+def test_walk_stops_after_consecutive_stored_ads():
+    store = ListingStore(':memory:')
+    store.upsert([Property(id=id, title=f"Flat {id}", price=500, address="Street", size=50, rooms=2)
+                  for id in ('4', '5', '6', '7')])
+    client = FakeClient()
+
+    properties = list(PropertyScraper(http_client=client).iter_ss_com(
+        max_price=1500, known_ids=store.ids(), stop_after_known=2))
+
+    assert [prop.id for prop in properties] == ['1', '3']
+    assert client.pages_read == [DEFAULT_TARGET.url, PAGE_2]
+    store.close()
+
+
+def test_targets_read_up_to_max_pages():
+    client = FakeClient()
+    property_scraper = PropertyScraper(http_client=client)
+
+    properties = property_scraper.scrape_targets([DEFAULT_TARGET], max_price=1500, max_pages=2,
+                                                 budget=RequestBudget(rate=1000))
+
+    assert [prop.id for prop in properties] == ['1', '3', '4', '5', '6']
+    assert client.pages_read == [DEFAULT_TARGET.url, PAGE_2]
+    assert property_scraper.failed_targets == []
@@ -0,0 +1,34 @@
+from listing_store import ListingStore
+from property import Property
+
+
+def make_property(id, price):
+    return Property(id=id, title=f"Flat {id}", price=price, address="Street 1", size=50, rooms=2,
+                    source_url=f"https://www.ss.com/msg/en/real-estate/flats/riga/teika/{id}.html")
+
+
+def test_rows_are_read_lazily_in_batches():
+    store = ListingStore(':memory:')
+    store.upsert([make_property(str(i), 300 + i) for i in range(10)])
+
+    rows = store._iter_rows(batch_size=3)
+    first = next(rows)
+    # The store stays usable while a row iterator is open
+    store.upsert([make_property('new', 100)])
+    rest = list(rows)
+
+    assert first.id == '0'
+    assert [prop.id for prop in rest] == [str(i) for i in range(1, 10)]
+    assert [prop.id for prop in store.load()][0] == 'new'
+    store.close()
+
+
+def test_ids_and_price_history():
+    store = ListingStore(':memory:')
+    store.upsert([make_property('a', 400), make_property('b', 500)])
+    store.upsert([make_property('a', 380)])
+
+    assert store.ids() == {'a', 'b'}
+    assert [price for _, price in store.price_history('a')] == [400, 380]
+    assert [prop.id for prop in store.find_by_district('Teika')] == ['a', 'b']
+    store.close()
@@ -0,0 +1,50 @@
+from property import Property
+from property_indexes import PropertyIndexes
+
+
+def make_property(id, price=400, address="Brīvības iela 10"):
+    return Property(id=id, title=f"Flat {id}", price=price, address=address, size=50, rooms=2)
+
+
+def test_bst_keeps_relisted_near_duplicates():
+    first = make_property('1')
+    indexes = PropertyIndexes([first]).build_all()
+    # The same flat listed again under a new ad id, at the same price
+    relisted = make_property('2')
+    indexes.add(relisted)
+    indexes.remove(first)
+
+    assert indexes.bst.find_range(0, 1000) == [relisted]
+    assert indexes.bst.find_range(0, 1000) == indexes.sorted_by_price
+
+
+def test_structures_agree_after_updates():
+    properties = [make_property(str(i), price=300 + (i % 5) * 50, address=f"Street {i}") for i in range(30)]
+    indexes = PropertyIndexes(list(properties)).build_all()
+    for prop in properties[::3]:
+        indexes.remove(prop)
+    for i in range(30, 40):
+        indexes.add(make_property(str(i), price=300 + (i % 7) * 40, address=f"Street {i}"))
+
+    by_price = sorted(prop.id for prop in indexes.sorted_by_price)
+    assert sorted(prop.id for prop in indexes.bst.find_range(0, 10000)) == by_price
+    assert sorted(prop.id for prop in indexes.min_heap.peek_k(100)) == by_price
+    assert sorted(prop.id for prop in indexes.priority_queue.peek_k(100)) == by_price
+    assert sorted(prop.id for prop in indexes.properties) == by_price
+
+
+def test_remove_tolerates_unknown_and_replaced_ids():
+    first = make_property('1')
+    indexes = PropertyIndexes([first]).build_all()
+
+    indexes.remove(make_property('never-added'))
+    indexes.remove(first)
+    indexes.remove(first)  # Already removed
+
+    # A newer listing under a known id replaces the old one in id-keyed structures
+    old, new = make_property('2', price=500), make_property('2', price=450)
+    indexes.add(old)
+    indexes.add(new)
+    indexes.remove(old)
+    assert indexes.priority_queue.peek_k(5) == [new]
+    assert indexes.text_index.filter_by_street("Brīvības") == [new]
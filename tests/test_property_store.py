@@ -0,0 +1,35 @@
+from data_structures.property_store import PropertyStore
+from property import Property
+
+
+def make_property(id, **fields):
+    values = dict(title=f"Flat {id}", price=400, address="Brīvības iela 10", size=50, rooms=2)
+    values.update(fields)
+    return Property(id=id, **values)
+
+
+def test_round_trip_keeps_every_field():
+    original = make_property(
+        '1', floor=3, has_furniture=True, kitchen_equipment=['fridge', 'oven'], bathroom='shower',
+        utilities_included=False, source_url='https://www.ss.com/msg/1.html', portal='ss.com',
+        published_date='2026-10-01', has_parking=None, pets_allowed=True, min_rent_term='1 year',
+        description="Sunny flat", region='riga/all/hand_over'
+    )
+    original.distance_to_center, original.time_to_center = 1.5, 3
+    original.latitude, original.longitude = 56.95, 24.12
+
+    restored = PropertyStore([original])[0]
+
+    assert restored.to_dict() == original.to_dict()
+
+
+def test_category_columns_decode_to_values():
+    store = PropertyStore([
+        make_property('1', min_rent_term='1 year', bathroom='bath'),
+        make_property('2', min_rent_term='6 months', bathroom=None),
+        make_property('3', min_rent_term='1 year', bathroom='bath'),
+    ])
+
+    assert [prop.min_rent_term for prop in store] == ['1 year', '6 months', '1 year']
+    assert [prop.bathroom for prop in store] == ['bath', None, 'bath']
+    assert store.categories['min_rent_term'] == ['1 year', '6 months']
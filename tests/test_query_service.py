@@ -0,0 +1,59 @@
+import asyncio
+import json
+
+from property import Property
+from property_indexes import PropertyIndexes
+from query_service import QueryService
+
+
+def make_service():
+    properties = [Property(id=str(i), title=f"Flat {i}", price=300 + 50 * i, address=f"Street {i}", size=50, rooms=2)
+                  for i in range(5)]
+    return QueryService(PropertyIndexes(properties))
+
+
+async def exchange(service, request):
+    """Send raw request bytes to a served QueryService and return the raw response"""
+    server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(request)
+    await writer.drain()
+    response = await asyncio.wait_for(reader.read(), timeout=5)
+    writer.close()
+    server.close()
+    await server.wait_closed()
+    return response
+
+
+def test_unexpected_errors_answer_500_and_are_not_cached(monkeypatch):
+    service = make_service()
+
+    def broken(params):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(service, 'query_top', broken)
+
+    status, body = service.handle('/top?k=3')
+    assert status == 500
+    assert 'RuntimeError' in json.loads(body)['error']
+    assert not service.cache
+
+    monkeypatch.undo()
+    assert service.handle('/top?k=3')[0] == 200
+
+
+def test_oversized_header_line_answers_400():
+    request = b"GET /stats HTTP/1.1\r\nX-Padding: " + b"a" * 100000 + b"\r\n\r\n"
+    response = asyncio.run(exchange(make_service(), request))
+    assert response.startswith(b"HTTP/1.1 400 Bad Request")
+    assert b"Connection: close" in response
+
+
+def test_error_inside_a_request_keeps_the_connection_answering(monkeypatch):
+    service = make_service()
+    monkeypatch.setattr(service, 'query_price', lambda params: 1 / 0)
+    request = (b"GET /price?min=0 HTTP/1.1\r\nHost: x\r\n\r\n"
+               b"GET /top?k=1 HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n")
+    response = asyncio.run(exchange(service, request))
+    assert response.startswith(b"HTTP/1.1 500 Internal Server Error")
+    assert b"HTTP/1.1 200 OK" in response
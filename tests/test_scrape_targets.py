@@ -0,0 +1,66 @@
+import argparse
+
+import pytest
+
+from batch import _scrape_target
+from http_client import RequestBudget
+from scrape_target import ScrapeTarget
+from scraper import PropertyScraper
+
+
+class Response:
+    def __init__(self, content, status_code=200):
+        self.content = content.encode()
+        self.status_code = status_code
+        self.headers = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise IOError(f"HTTP {self.status_code}")
+
+
+ROW = '<tr id="tr_{id}"><td><a href="/msg/en/real-estate/flats/x/{id}.html">Flat {id}</a></td><td>{price} €</td></tr>'
+DETAIL = ('<div id="msg_div_msg">Flat<table><tr><td>Address:</td><td>Street {id}</td></tr>'
+          '<tr><td>Area:</td><td>50 m²</td></tr></table></div>')
+PAGES = {
+    'riga/all/hand_over': [('1', 400), ('2', 500), ('3', 2000)],
+    'jurmala/all/hand_over': [('2', 500), ('4', 700)],
+    'jurmala/all/sell': [('5', 90000)],
+}
+
+
+class FakeClient:
+    def get(self, url, **kwargs):
+        for label, rows in PAGES.items():
+            if url.endswith(f"/{label}/"):
+                return Response("<table>" + "".join(ROW.format(id=id, price=price) for id, price in rows) + "</table>")
+        if url.endswith('.html'):
+            return Response(DETAIL.format(id=url.rsplit('/', 1)[1][:-5]))
+        return Response("", 503)
+
+
+def test_parse_fills_defaults_and_rejects_bad_specs():
+    assert ScrapeTarget.parse('Jurmala') == ScrapeTarget('jurmala', 'all', 'hand_over')
+    assert ScrapeTarget.parse('riga/centre/').url == "https://www.ss.com/en/real-estate/flats/riga/centre/hand_over/"
+    for spec in ('a/b/c/d', 'riga//sell', 'ri ga', '../etc'):
+        with pytest.raises(ValueError):
+            ScrapeTarget.parse(spec)
+        with pytest.raises(argparse.ArgumentTypeError):
+            _scrape_target(spec)
+    assert _scrape_target('riga/teika') == 'riga/teika'
+
+
+def test_targets_are_merged_deduplicated_and_tagged():
+    scraper = PropertyScraper(http_client=FakeClient())
+    assert scraper.failed_targets == []
+
+    properties = scraper.scrape_targets(
+        ['riga', 'jurmala/all/hand_over', 'jurmala/all/sell', 'broken', 'riga/all/hand_over'], max_price=1500,
+        budget=RequestBudget(rate=1000)
+    )
+
+    assert [(prop.id, prop.region) for prop in properties] == [
+        ('1', 'riga/all/hand_over'), ('2', 'riga/all/hand_over'),
+        ('4', 'jurmala/all/hand_over'), ('5', 'jurmala/all/sell'),
+    ]
+    assert scraper.failed_targets == [ScrapeTarget('broken', 'all', 'hand_over')]
@@ -0,0 +1,31 @@
+from filtering import PropertyFilter
+from property import Property
+
+
+def make_property(id, price, size, distance):
+    prop = Property(id=id, title=f"Flat {id}", price=price, address="Street 1", size=size, rooms=2)
+    prop.distance_to_center = distance
+    return prop
+
+
+PROPERTIES = [make_property('a', 300, 0, None), make_property('b', 500, 50, 2.0), make_property('c', 600, 40, 4.0)]
+
+
+def ids(properties):
+    return [prop.id for prop in properties]
+
+
+def test_descending_keys_keep_missing_values_last():
+    assert ids(PropertyFilter.top_k(PROPERTIES, 3, ('price_per_m2', True))) == ['c', 'b', 'a']
+    assert ids(PropertyFilter.top_k(PROPERTIES, 3, ('distance', True))) == ['c', 'b', 'a']
+    assert ids(PropertyFilter.sort_by(PROPERTIES, ('distance', True))) == ['c', 'b', 'a']
+
+
+def test_ascending_keys_keep_missing_values_last():
+    assert ids(PropertyFilter.sort_by(PROPERTIES, 'distance')) == ['b', 'c', 'a']
+    assert ids(PropertyFilter.top_k(PROPERTIES, 2, 'price_per_m2')) == ['b', 'c']
+
+
+def test_top_k_matches_sort_by():
+    for keys in (('price',), (('price', True),), ('rooms', ('size', True)), (('time', True), 'price')):
+        assert ids(PropertyFilter.top_k(PROPERTIES, 2, *keys)) == ids(PropertyFilter.sort_by(PROPERTIES, *keys))[:2]
@@ -0,0 +1,93 @@
+import json
+import random
+import time
+
+from batch import build_arg_parser, run_query
+from data_structures.spatial_index import SpatialGrid, haversine_km
+from property import Property
+from property_indexes import PropertyIndexes
+from query_service import QueryService
+
+
+def make_properties(n, seed=0):
+    rng = random.Random(seed)
+    properties = []
+    for i in range(n):
+        prop = Property(id=str(i), title=f"Flat {i}", price=300 + i, address=f"Street {i}", size=50, rooms=2)
+        prop.latitude, prop.longitude = 56.90 + rng.random() * 0.15, 24.00 + rng.random() * 0.25
+        properties.append(prop)
+    return properties
+
+
+def brute_force(properties, lat, lng):
+    return sorted((haversine_km(lat, lng, p.latitude, p.longitude), p.id) for p in properties)
+
+
+POINTS = [(56.95, 24.12), (56.93, 24.05), (57.5, 25.0), (0.0, 0.0)]
+
+
+def test_nearest_matches_brute_force():
+    properties = make_properties(500)
+    grid = SpatialGrid.from_properties(properties)
+    for lat, lng in POINTS:
+        for k in (1, 7, 600):
+            expected = [id for _, id in brute_force(properties, lat, lng)[:k]]
+            assert [prop.id for _, prop in grid.nearest(lat, lng, k)] == expected
+
+
+def test_within_radius_matches_brute_force():
+    properties = make_properties(500)
+    grid = SpatialGrid.from_properties(properties)
+    for lat, lng in POINTS:
+        for radius in (0.5, 3, 100, 20000):
+            expected = [id for distance, id in brute_force(properties, lat, lng) if distance <= radius]
+            assert [prop.id for _, prop in grid.within_radius(lat, lng, radius)] == expected
+
+
+def test_far_queries_on_a_small_grid_are_fast():
+    grid = SpatialGrid.from_properties(make_properties(20))
+    start = time.perf_counter()
+    assert len(grid.nearest(0.0, 0.0, 1)) == 1
+    assert len(grid.within_radius(0.0, 0.0, 20000)) == 20
+    assert time.perf_counter() - start < 0.5
+
+
+def test_indexes_keep_grid_current():
+    properties = make_properties(50)
+    indexes = PropertyIndexes(list(properties)).build_all()
+    target = properties[10]
+    assert indexes.nearest(target.latitude, target.longitude, 1) == [target]
+
+    indexes.remove(target)
+    assert target not in indexes.nearest(target.latitude, target.longitude, 5)
+    indexes.add(target)
+    assert indexes.nearest(target.latitude, target.longitude, 1) == [target]
+
+
+def test_batch_near_query_is_nearest_first():
+    properties = make_properties(100)
+    indexes = PropertyIndexes(properties)
+    args = build_arg_parser().parse_args(['--near', '56.95', '24.12', '--radius', '3', '--max-price', '350'])
+
+    results = run_query(indexes, args)
+
+    expected = [id for distance, id in brute_force(properties, 56.95, 24.12)
+                if distance <= 3 and int(id) + 300 <= 350]
+    assert [prop.id for prop in results] == expected
+    assert indexes.is_built('spatial')
+
+
+def test_service_near_and_nearest():
+    properties = make_properties(100)
+    service = QueryService(PropertyIndexes(properties))
+
+    status, body = service.handle('/nearest?lat=56.95&lng=24.12&k=3')
+    assert status == 200
+    assert [item['id'] for item in json.loads(body)['results']] == \
+        [id for _, id in brute_force(properties, 56.95, 24.12)[:3]]
+
+    status, body = service.handle('/near?lat=56.95&lng=24.12&radius=1')
+    assert status == 200
+    assert json.loads(body)['total'] == sum(1 for d, _ in brute_force(properties, 56.95, 24.12) if d <= 1)
+
+    assert service.handle('/near?lat=56.95&radius=1')[0] == 400
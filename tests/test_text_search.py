@@ -0,0 +1,69 @@
+from batch import build_arg_parser, run_query
+from data_structures.property_store import PropertyStore
+from filtering import PropertyFilter, PropertyQuery
+from property import Property
+from property_indexes import PropertyIndexes
+from scraper import PropertyScraper
+
+
+def make_property(id, address, description=None, price=400):
+    return Property(id=id, title=f"Flat {id}", price=price, address=address, size=50, rooms=2,
+                    description=description)
+
+
+PROPERTIES = [
+    make_property('1', "Rīga, Teika, Brīvības gatve 300", "Furnished, parking in the yard", 500),
+    make_property('2', "Riga, Centrs, Tērbatas iela 5", "Квартира с мебелью", 450),
+    make_property('3', "Rīga, Purvciems, Dzelzavas iela 10", None, 300),
+    make_property('4', "Riga, Center, Brivibas iela 50", "Near the park", 600),
+]
+
+
+def ids(properties):
+    return [prop.id for prop in properties]
+
+
+def test_filter_by_district_normalizes_diacritics_and_variants():
+    assert ids(PropertyFilter.filter_by_district(PROPERTIES, ["teika"])) == ['1']
+    assert ids(PropertyFilter.filter_by_district(PROPERTIES, ["centre", "Purvciems"])) == ['2', '3', '4']
+
+
+def test_batch_text_filters_use_the_index():
+    indexes = PropertyIndexes(PROPERTIES)
+    parser = build_arg_parser()
+
+    assert ids(run_query(indexes, parser.parse_args(['--district', 'Centrs']))) == ['2', '4']
+    assert ids(run_query(indexes, parser.parse_args(['--street', 'Brīvības']))) == ['1', '4']
+    assert ids(run_query(indexes, parser.parse_args(['--keywords', 'mebel']))) == ['2']
+    assert indexes.is_built('text')
+
+
+def test_detail_flags_from_tokens():
+    scraper = PropertyScraper(http_client=object())
+    page = ('<div id="msg_div_msg">Dzīvnieki atļauti, ar mēbelēm, autostāvvieta. Uz gadu. '
+            'Utilities included.<table><tr><td>Rooms:</td><td>2</td></tr></table></div>')
+    details = scraper._parse_ss_property_details(page.encode())
+    assert details['pets_allowed'] and details['has_furniture'] and details['has_parking']
+    assert details['utilities_included'] and details['min_rent_term'] == '1 year'
+
+    details = scraper._parse_ss_property_details(b'<div id="msg_div_msg">No pets, 6 months minimum</div>')
+    assert not details['pets_allowed'] and not details['has_furniture'] and not details['has_parking']
+    assert details['min_rent_term'] == '6 months'
+
+
+def test_negated_amenities_are_not_flagged():
+    scraper = PropertyScraper(http_client=object())
+    for text in ("Bez mēbelēm.", "Without furniture, no parking", "Квартира без мебели, не парковка"):
+        details = scraper._parse_ss_property_details(f'<div id="msg_div_msg">{text}</div>'.encode())
+        assert not details['has_furniture'] and not details['has_parking'], text
+
+    details = scraper._parse_ss_property_details('<div id="msg_div_msg">Bez mēbelēm, ar stāvvietu</div>'.encode())
+    assert not details['has_furniture'] and details['has_parking']
+
+
+def test_list_and_store_district_filters_match_the_text_index():
+    queries = (["teika"], ["centre", "Purvciems"], ["Brīvības iela"], ["riga c"])
+    for districts in queries:
+        expected = ids(PropertyIndexes(PROPERTIES).text_index.filter_by_district(districts))
+        assert ids(PropertyFilter.filter_by_district(PROPERTIES, districts)) == expected, districts
+        assert ids(PropertyQuery(PropertyStore(PROPERTIES)).district(districts).results()) == expected, districts
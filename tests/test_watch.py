@@ -0,0 +1,107 @@
+import random
+
+import watch
+from listing_store import ListingStore
+from property import Property
+from property_indexes import PropertyIndexes
+from watch import AdaptivePollScheduler, ListingWatcher
+
+
+def make_property(id, price, address=None, latitude=None):
+    prop = Property(id=id, title=f"Flat {id}", price=price, address=address or f"Street {id}", size=50, rooms=2)
+    if latitude is not None:
+        prop.latitude, prop.longitude = latitude, 24.1
+        prop.distance_to_center, prop.time_to_center = 1.5, 20
+    return prop
+
+
+class StubScraper:
+    """Returns one prepared result per poll; an exception instance is raised instead"""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.known_prices = []
+
+    def poll_ss_com(self, known_prices, max_price=1500, workers=1):
+        self.known_prices.append(dict(known_prices))
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def test_new_ads_shorten_the_interval_and_quiet_windows_grow_it():
+    scheduler = AdaptivePollScheduler(min_interval=15, max_interval=60, initial_interval=30, window=3,
+                                      rng=random.Random(0))
+    scheduler.record(1)
+    assert scheduler.interval == 15
+
+    scheduler.record(0)
+    scheduler.record(0)
+    assert scheduler.interval == 15  # The poll with new ads is still in the window
+    scheduler.record(0)
+    assert scheduler.interval == 22.5
+    for _ in range(5):
+        scheduler.record(0)
+    assert scheduler.interval == 60
+
+
+def test_errors_double_the_interval_up_to_the_maximum():
+    scheduler = AdaptivePollScheduler(initial_interval=20, max_interval=60, rng=random.Random(0))
+    scheduler.record_error()
+    assert (scheduler.interval, scheduler.errors) == (40, 1)
+    scheduler.record_error()
+    assert (scheduler.interval, scheduler.errors) == (60, 2)
+    scheduler.record(0)
+    assert scheduler.errors == 0
+
+
+def test_delays_are_jittered_reproducibly_and_capped():
+    delays = []
+    for _ in range(2):
+        scheduler = AdaptivePollScheduler(initial_interval=30, max_interval=60, jitter=0.2, rng=random.Random(7))
+        delays.append([scheduler.next_delay() for _ in range(20)])
+    assert delays[0] == delays[1]
+    assert all(24 <= delay <= 36 for delay in delays[0])
+    assert len(set(delays[0])) > 1
+
+    scheduler = AdaptivePollScheduler(initial_interval=60, max_interval=60, rng=random.Random(7))
+    assert all(delay <= 60 for delay in (scheduler.next_delay() for _ in range(20)))
+
+
+def test_watcher_applies_new_and_repriced_ads(monkeypatch):
+    geocoded = []
+
+    def geocode(properties, cache=None):
+        geocoded.extend(prop.id for prop in properties)
+        for prop in properties:
+            prop.latitude, prop.longitude = 56.9, 24.2
+
+    monkeypatch.setattr(watch, 'geocode_properties', geocode)
+    old = [make_property('a', 400, latitude=56.95), make_property('b', 500, latitude=56.96)]
+    store = ListingStore(':memory:')
+    store.upsert(old)
+    indexes = PropertyIndexes(list(old)).build_all()
+    scraper = StubScraper([
+        [make_property('a', 380), make_property('c', 450)],
+        IOError("connection reset"),
+    ])
+    watcher = ListingWatcher(scraper, store, indexes, scheduler=AdaptivePollScheduler(rng=random.Random(0)))
+    reports, sleeps = [], []
+
+    watcher.run(max_polls=2, report=reports.append, sleep=sleeps.append)
+
+    assert watcher.polls == 2 and len(sleeps) == 1
+    assert scraper.known_prices[1] == {'a': 380, 'b': 500, 'c': 450}
+    # The re-priced ad keeps the coordinates already known, only the new one is geocoded
+    assert geocoded == ['c']
+    assert indexes.get('a').latitude == 56.95
+    assert [prop.id for prop in indexes.sorted_by_price] == ['a', 'c', 'b']
+    assert [prop.id for prop in indexes.min_heap.peek_k(5)] == ['a', 'c', 'b']
+    assert [prop.id for prop in indexes.bst.find_range(0, 1000)] == ['a', 'c', 'b']
+    assert sorted(prop.id for prop in indexes.properties) == ['a', 'b', 'c']
+    assert store.snapshot()['a'][0] == 380 and 'c' in store.ids()
+    assert any("NEW PROPERTY" in line for line in reports)
+    assert any("Price changed" in line for line in reports)
+    assert reports[-1].startswith("Poll failed (connection reset)")
+    store.close()
@@ -1,48 +1,89 @@
-import requests
 import math
 import time
+from collections import deque
+from geocache import GeocodeCache
+from http_client import get_client
+from data_structures.spatial_index import haversine_km
 
-def calculate_distance_to_center(address):
-    """Calculate the real distance from an address to Riga center (Origo)"""
-    # Center coordinates (Origo/Station square)
-    center_lat, center_lng = 56.949653, 24.118738
-    
+# Center coordinates (Origo/Station square)
+CENTER_LAT, CENTER_LNG = 56.949653, 24.118738
+
+# Nominatim usage policy allows at most one request per second
+NOMINATIM_MIN_INTERVAL = 1.0
+
+
+def nominatim_geocode(address):
+    """Geocode an address with Nominatim (OpenStreetMap), returning (lat, lon) or None"""
+    # In a real project, could use Google Maps API or similar
+    search_address = f"{address}, Riga, Latvia"
+    url = "https://nominatim.openstreetmap.org/search"
+
+    response = get_client().get(
+        url,
+        params={'q': search_address, 'format': 'json', 'limit': 1},
+        headers={'User-Agent': 'PropertySearchProject'}
+    )
+    data = response.json()
+
+    if data and len(data) > 0:
+        return float(data[0]['lat']), float(data[0]['lon'])
+    return None
+
+
+def distance_from_center(lat, lng):
+    """Return (distance km, driving minutes) from coordinates to Riga center"""
+    # Calculate distance (Haversine formula km)
+    distance = haversine_km(CENTER_LAT, CENTER_LNG, lat, lng)
+
+    # Calculate driving time in minutes (assume average speed 30 km/h in city)
+    time_minutes = math.ceil(distance / 30 * 60)
+
+    return round(distance, 2), time_minutes
+
+
+def calculate_distance_to_center(address, cache=None, geocoder=nominatim_geocode):
+    """Calculate the real distance from an address to Riga center (Origo)
+
+    If a GeocodeCache is given, cached addresses are answered without
+    contacting Nominatim and new results are stored in it.
+    """
     # If address is empty or None, use default value
     if not address or address.strip() == "":
         return 5.0, 15
-    
+
+    if cache is not None:
+        cached = cache.get(address)
+        if cached is not None:
+            return cached[2], cached[3]
+
+    return _geocode_location(address, cache, geocoder)[2:]
+
+
+def _geocode_location(address, cache, geocoder):
+    """Geocode address and store the result in cache
+
+    Returns (lat, lng, distance, minutes); lat/lng are None when only a
+    district-based estimate was possible.
+    """
     try:
-        # Use Nominatim (OpenStreetMap) geocoding
-        # In a real project, could use Google Maps API or similar
-        search_address = f"{address}, Riga, Latvia"
-        url = f"https://nominatim.openstreetmap.org/search?q={search_address}&format=json&limit=1"
-        
-        response = requests.get(url, headers={'User-Agent': 'PropertySearchProject'})
-        data = response.json()
-        
-        if data and len(data) > 0:
-            # Get coordinates
-            lat = float(data[0]['lat'])
-            lng = float(data[0]['lon'])
-            
-            # Calculate distance (Haversine formula km)
-            R = 6371  # Earth radius in km
-            dlat = math.radians(lat - center_lat)
-            dlng = math.radians(lng - center_lng)
-            
-            a = math.sin(dlat/2)**2 + math.cos(math.radians(center_lat)) * math.cos(math.radians(lat)) * math.sin(dlng/2)**2
-            c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-            distance = R * c
-            
-            # Calculate driving time in minutes (assume average speed 30 km/h in city)
-            time_minutes = math.ceil(distance / 30 * 60)
-            
-            return round(distance, 2), time_minutes
-    
+        coordinates = geocoder(address)
+        if coordinates is not None:
+            lat, lng = coordinates
+            distance, time_minutes = distance_from_center(lat, lng)
+
+            if cache is not None:
+                cache.put(address, lat, lng, distance, time_minutes)
+
+            return lat, lng, distance, time_minutes
+
     except Exception as e:
         print(f"Error calculating distance: {e}")
-    
-    # If calculation failed, use approximate value based on district name
+
+    return (None, None) + estimate_distance_by_district(address)
+
+
+def estimate_distance_by_district(address):
+    """Approximate distance to center based on district or street name"""
     districts = {
         "center": 0.5,
         "oldtown": 0.3,
@@ -93,6 +134,50 @@ def calculate_distance_to_center(address):
     return 5.0, 15
 
 
+def geocode_properties(properties, geocoder=nominatim_geocode, cache=None,
+                       min_interval=NOMINATIM_MIN_INTERVAL):
+    """Set coordinates and distance/time to center for a batch of properties
+
+    Addresses are deduplicated first, so each distinct address is geocoded
+    once. Lookups that miss the cache go through a queue that waits
+    min_interval seconds between geocoder calls. Returns request statistics.
+    """
+    groups = {}
+    for prop in properties:
+        groups.setdefault(GeocodeCache.normalize(prop.address or ""), []).append(prop)
+
+    queue = deque(groups)
+    requests_made = 0
+    last_request = None
+
+    while queue:
+        key = queue.popleft()
+        address = groups[key][0].address
+
+        cached = cache.get(address) if cache is not None and key else None
+        if cached is not None:
+            lat, lng, distance, time_minutes = cached
+        elif not key:
+            lat, lng = None, None
+            distance, time_minutes = calculate_distance_to_center(address)
+        else:
+            if last_request is not None:
+                wait = min_interval - (time.monotonic() - last_request)
+                if wait > 0:
+                    time.sleep(wait)
+            last_request = time.monotonic()
+            requests_made += 1
+            lat, lng, distance, time_minutes = _geocode_location(address, cache, geocoder)
+
+        for prop in groups[key]:
+            prop.latitude = lat
+            prop.longitude = lng
+            prop.distance_to_center = distance
+            prop.time_to_center = time_minutes
+
+    return {'properties': len(properties), 'addresses': len(groups), 'requests': requests_made}
+
+
 def measure_time_complexity(func, *args, **kwargs):
     """Measure function execution time for time complexity analysis"""
     start_time = time.time()
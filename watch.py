@@ -0,0 +1,158 @@
+import random
+import time
+from collections import deque
+from listing_diff import ADDED, PRICE_CHANGED, DETAILS_CHANGED, diff_listings, fingerprint
+from snapshot import save_snapshot
+from utils import geocode_properties
+
+
+class AdaptivePollScheduler:
+    """Polling interval that follows how many new ads recent polls found
+
+    A poll that found new ads shortens the interval in proportion to their
+    number (down to min_interval). Once a whole window of polls found
+    nothing, it grows by growth per quiet poll up to max_interval. Failed
+    polls double it, also up to max_interval. Every delay is spread by
+    +-jitter (a fraction) so polls do not fall on a fixed beat, and never
+    exceeds max_interval, which bounds how long a new ad goes unseen.
+    """
+
+    def __init__(self, min_interval=15, max_interval=60, initial_interval=30,
+                 growth=1.5, jitter=0.2, window=5, rng=None):
+        """Initialize scheduler (intervals in seconds)"""
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = initial_interval
+        self.growth = growth
+        self.jitter = jitter
+        self.recent = deque(maxlen=window)  # New ads found by the last polls
+        self.errors = 0  # Consecutive failed polls
+        self.rng = rng or random.Random()
+
+    def record(self, new_count):
+        """Adapt the interval to the result of a successful poll"""
+        self.errors = 0
+        self.recent.append(new_count)
+        if new_count:
+            self.interval = max(self.min_interval, self.interval / (1 + new_count))
+        elif not any(self.recent):
+            self.interval = min(self.max_interval, self.interval * self.growth)
+
+    def record_error(self):
+        """Back off after a failed poll"""
+        self.errors += 1
+        self.interval = min(self.max_interval, self.interval * 2)
+
+    def next_delay(self):
+        """Seconds to wait before the next poll"""
+        delay = self.interval * (1 + self.rng.uniform(-self.jitter, self.jitter))
+        return max(1.0, min(self.max_interval, delay))
+
+
+class ListingWatcher:
+    """Keeps the listing store and in-memory indexes current by polling ss.com
+
+    Each poll reads only the first listing page. Detail pages are fetched
+    only for new or re-priced ads, and only listings without known
+    coordinates are geocoded. Changes are written to the store and
+    applied to the PropertyIndexes in place.
+    """
+
+    def __init__(self, scraper, listing_store, indexes, geocode_cache=None, scheduler=None,
+                 max_price=1500, workers=2, snapshot_path=None):
+        """Initialize watcher over already loaded indexes"""
+        self.scraper = scraper
+        self.listing_store = listing_store
+        self.indexes = indexes
+        self.geocode_cache = geocode_cache
+        self.scheduler = scheduler or AdaptivePollScheduler()
+        self.max_price = max_price
+        self.workers = workers
+        self.snapshot_path = snapshot_path
+        self.polls = 0
+
+    def fetch_changes(self):
+        """Fetch new and re-priced ads and diff them against the indexes
+
+        Only reads the indexes, so it can run in a worker thread while
+        the indexes are being queried.
+        """
+        known_prices = {prop.id: prop.price for prop in self.indexes.properties}
+        fetched = self.scraper.poll_ss_com(known_prices, self.max_price, workers=self.workers)
+        if not fetched:
+            return []
+
+        # Re-priced ads keep their address, reuse the coordinates already known
+        to_geocode = []
+        for prop in fetched:
+            old = self.indexes.get(prop.id)
+            if old is not None and old.address == prop.address and old.latitude is not None:
+                prop.latitude, prop.longitude = old.latitude, old.longitude
+                prop.distance_to_center, prop.time_to_center = old.distance_to_center, old.time_to_center
+            else:
+                to_geocode.append(prop)
+        if to_geocode:
+            geocode_properties(to_geocode, cache=self.geocode_cache)
+
+        snapshot = {}
+        for prop in fetched:
+            old = self.indexes.get(prop.id)
+            if old is not None:
+                snapshot[prop.id] = (old.price, fingerprint(old))
+        return diff_listings(snapshot, fetched, complete=False)
+
+    def apply_changes(self, changes):
+        """Apply changes to the in-memory indexes"""
+        replaced = set()
+        for change in changes:
+            if change.kind == ADDED:
+                self.indexes.add(change.new)
+            elif change.id not in replaced:
+                self.indexes.replace(self.indexes.get(change.id), change.new)
+                replaced.add(change.id)
+
+    def persist(self, changes, properties):
+        """Write changes to the listing store and properties to the snapshot"""
+        self.listing_store.apply_changes(changes)
+        if self.snapshot_path:
+            save_snapshot(properties, self.snapshot_path)
+
+    def poll(self):
+        """Run one poll and return its ListingChange events"""
+        changes = self.fetch_changes()
+        if changes:
+            self.apply_changes(changes)
+            self.persist(changes, self.indexes.properties)
+        return changes
+
+    def record(self, changes, report=print):
+        """Feed a poll result to the scheduler and report the changes"""
+        self.polls += 1
+        added = [change.new for change in changes if change.kind == ADDED]
+        self.scheduler.record(len(added))
+        for prop in added:
+            report(f"\n=== NEW PROPERTY ===\n{prop}")
+        for change in changes:
+            if change.kind == PRICE_CHANGED:
+                report(f"Price changed: {change.new.title} {change.old[0]:.2f} -> {change.new.price:.2f} EUR")
+            elif change.kind == DETAILS_CHANGED:
+                report(f"Details updated: {change.new.title}")
+
+    def record_error(self, error, report=print):
+        """Feed a failed poll to the scheduler and report it"""
+        self.polls += 1
+        self.scheduler.record_error()
+        report(f"Poll failed ({error}), retrying in about {self.scheduler.interval:.0f} s")
+
+    def run(self, max_polls=None, report=print, sleep=time.sleep):
+        """Poll until interrupted (or max_polls), reporting changes as they are found"""
+        while max_polls is None or self.polls < max_polls:
+            try:
+                changes = self.poll()
+            except Exception as e:
+                self.record_error(e, report)
+            else:
+                self.record(changes, report)
+            if max_polls is not None and self.polls >= max_polls:
+                break
+            sleep(self.scheduler.next_delay())